@@ -1,37 +1,56 @@
-from time import time
+from gameclock import game_time
 from globalSurfaces import BUTTON_DOWN, BUTTON_UP, BUTTON_PUSHED_SOUND
 import pygame as pg
+from fonts import get_font, render_text
+from renderer import blit_premultiplied
+from sprite import widget_sprite
 
 
 class Button:
     def __init__(self, rect: pg.Rect, text="", text_color=(0, 0, 0), font_size=23):
-        self.surf = BUTTON_UP
+        self.surf = BUTTON_UP.get()
         self.rect = self.surf.get_rect(topleft=rect.topleft)
         self.state = "UP"
         self.text = text
         self.text_color = text_color
         self.font_size = font_size
-        self.font = pg.font.SysFont("Arial", self.font_size)
-        self.text_surf = self.font.render(self.text, True, self.text_color)
+        self.font = get_font("Arial", self.font_size)
+        self.text_surf = render_text(self.text, self.text_color, self.font_size)
         self.text_rect = self.text_surf.get_rect(
             center=(self.rect.center[0], self.rect.center[1] - 50)
         )
         self.last_pressed_time = None
+        # the button and its label composited together, the label can stick out of the button
+        self.sprite_rect = self.rect.union(self.text_rect)
+
+    def sprite(self) -> pg.Surface:
+        """The button in its current state with its label, one surface per state shared by the same buttons.
+        Premultiplied alpha like the StaticLayer, it looks exactly like the two separate blits."""
+
+        def build():
+            sprite = pg.Surface(self.sprite_rect.size, pg.SRCALPHA)
+            offset = (-self.sprite_rect.x, -self.sprite_rect.y)
+            blit_premultiplied(sprite, self.surf, self.rect.move(offset))
+            blit_premultiplied(sprite, self.text_surf, self.text_rect.move(offset))
+            return sprite
+
+        offset = (self.text_rect.x - self.rect.x, self.text_rect.y - self.rect.y)
+        key = ("button", self.text, self.text_color, self.font_size, offset)
+        return widget_sprite(key, build, self.surf)
 
     def draw(self, surface: pg.Surface):
-        surface.blit(self.surf, self.rect)
-        surface.blit(self.text_surf, self.text_rect)
+        surface.blit(self.sprite(), self.sprite_rect, special_flags=pg.BLEND_PREMULTIPLIED)
 
     def is_clicked(self, event):
         if event.type == pg.USEREVENT + 0 and self.rect.collidepoint(event.pos):
-            self.last_pressed_time = time()
+            self.last_pressed_time = game_time()
             return True
         return False
 
     def handle_event(self, event):
         if self.is_clicked(event):
             self.state = "DOWN"
-            self.surf = BUTTON_DOWN
+            self.surf = BUTTON_DOWN.get()
             BUTTON_PUSHED_SOUND.play()
 
         if event.type == pg.USEREVENT + 1:  # Reset event
@@ -39,4 +58,4 @@ class Button:
 
     def reset(self):
         self.state = "UP"
-        self.surf = BUTTON_UP
+        self.surf = BUTTON_UP.get()
@@ -0,0 +1,101 @@
+import threading
+import sprite
+import audio
+
+# lazy asset handles : nothing is decoded until someone actually needs it
+
+
+class AssetHandle:
+    def __init__(self, loader, name: str = ""):
+        """Wraps a loader function, the asset is only loaded the first time get() is called."""
+        self.name = name
+        self._loader = loader
+        self._value = None
+        self._lock = threading.Lock()  # handles can be loaded from the preloader threads
+
+    @property
+    def loaded(self) -> bool:
+        return self._value is not None
+
+    def get(self):
+        """Returns the loaded asset, loading it if needed."""
+        if self._value is None:
+            with self._lock:
+                if self._value is None:  # another thread may have loaded it while we waited
+                    self._value = self._loader()
+        return self._value
+
+    def unload(self):
+        """Forgets the loaded asset so its memory can be freed, it will be reloaded on the next get()."""
+        self._value = None
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.name!r} loaded={self.loaded}>"
+
+
+class SoundHandle(AssetHandle):
+    """Lazy pg.mixer.Sound, play() can be called directly on the handle (on the channels of its category)."""
+
+    def __init__(self, loader, name: str = "", category: str = "ui"):
+        super().__init__(loader, name)
+        self.category = category
+
+    def play(self, *args, **kwargs):
+        return audio.play(self.get(), self.category, *args, **kwargs)
+
+    def stop(self):
+        if self.loaded:
+            self.get().stop()
+
+
+class AssetRegistry:
+    def __init__(self):
+        self.handles: dict[tuple, AssetHandle] = {}
+
+    def image(self, path: str, scale=1, size=None) -> AssetHandle:
+        """Registers an image, same arguments as sprite.load_image."""
+        key = ("image", path, scale, size)
+        if key not in self.handles:
+            self.handles[key] = AssetHandle(
+                lambda: sprite.load_image(path, scale, size), path
+            )
+        return self.handles[key]
+
+    def sound(self, path: str, category: str = "ui") -> SoundHandle:
+        """category : the channels it plays on, see audio.VOICES."""
+        key = ("sound", path)
+        if key not in self.handles:
+            self.handles[key] = SoundHandle(lambda: audio.load_sound(path), path, category)
+        return self.handles[key]
+
+    def tone(self, frequency: float, duration: float, category: str = "colors") -> SoundHandle:
+        """A note made by audio.tone, synthesized on first use."""
+        key = ("tone", frequency, duration)
+        if key not in self.handles:
+            self.handles[key] = SoundHandle(
+                lambda: audio.tone(frequency, duration), f"{frequency:g} Hz tone", category
+            )
+        return self.handles[key]
+
+    def lazy(self, loader, name: str) -> AssetHandle:
+        """Registers anything built from other assets (spritesheets, animations...)."""
+        key = ("lazy", name)
+        if key not in self.handles:
+            self.handles[key] = AssetHandle(loader, name)
+        return self.handles[key]
+
+    def warm_up(self, handles=None):
+        """Loads the given handles (or every registered one) right now instead of on first use."""
+        for handle in self.handles.values() if handles is None else handles:
+            handle.get()
+
+    def unload(self, handles=None):
+        for handle in self.handles.values() if handles is None else handles:
+            handle.unload()
+
+
+def resolve(asset):
+    """Returns the real object behind a handle, anything else is returned as is."""
+    if isinstance(asset, AssetHandle):
+        return asset.get()
+    return asset
@@ -0,0 +1,131 @@
+import os
+import numpy as np
+import pygame as pg
+import diskcache
+
+# mixer settings, sound loading and the channels each kind of sound plays on
+# pre_init() has to be called before pg.init() : 16 bit stereo with a small buffer, so a sound starts
+# about 6 ms after play() instead of 12+ with the default buffer
+# the clips are stored as mono int16 (put on both sides when played) with their silent tail cut off (the .wav files are 6 s long for half a second of sound),
+# and cached that way in SOUND_CACHE_DIR
+
+FREQUENCY = 44100
+BUFFER = 256  # samples per mixer callback
+SILENCE = 64  # samples quieter than this at the end of a clip are cut
+TAIL = 441  # samples (10 ms) kept after the last audible one, faded out so the cut doesn't click
+SOUND_CACHE_DIR = os.path.join(".cache", "sounds")
+
+# channels reserved for each category : a category never cuts the sounds of another one,
+# when all its channels are busy its oldest sound is stopped for the new one
+VOICES = {
+    "ui": 2,  # buttons, start of the game
+    "colors": 2,  # color sequence buttons
+    "memory": 2,  # memory pair found or wrong
+    "jingles": 2,  # puzzle piece and level achieved
+}
+
+
+# tones of the color buttons : the four of the original Simon game (red, green, blue, yellow),
+# then a pentatonic scale from A4 for the colors after them
+SIMON_NOTES = (310.0, 415.0, 209.0, 252.0)
+PENTATONIC = (0, 2, 4, 7, 9)  # semitones above the start of each octave
+
+
+def pre_init():
+    pg.mixer.pre_init(FREQUENCY, -16, 2, BUFFER)  # stereo for the music
+
+
+def compact(samples: np.ndarray) -> np.ndarray:
+    """Mono int16 samples without the silent tail."""
+    if samples.ndim > 1:
+        samples = samples.mean(axis=1)
+    samples = samples.astype(np.int16)
+    audible = np.flatnonzero(np.abs(samples.astype(np.int32)) > SILENCE)
+    end = min(len(samples), audible[-1] + 1 + TAIL) if len(audible) else 1
+    samples = samples[:end].copy()
+    tail = samples[max(0, end - TAIL) :]
+    tail[:] = tail * np.linspace(1, 0, len(tail))
+    return samples
+
+
+def load_sound(path: str) -> pg.mixer.Sound:
+    """Like pg.mixer.Sound(path), but trimmed and cached (as mono). Needs a 16 bit mixer (else the file is loaded as is)."""
+    frequency, size, channels = pg.mixer.get_init()
+    if size != -16:
+        return pg.mixer.Sound(path)
+
+    samples = None
+    cache_path = diskcache.cache_path(SOUND_CACHE_DIR, path, frequency, suffix=".pcm") if SOUND_CACHE_DIR else None
+    if cache_path:
+        try:
+            samples = np.fromfile(cache_path, dtype=np.int16)
+        except (OSError, ValueError):
+            pass
+    if samples is None:
+        samples = compact(pg.sndarray.array(pg.mixer.Sound(path)))
+        if cache_path:
+            diskcache.write_file(cache_path, samples)
+
+    if channels > 1:
+        samples = np.repeat(samples[:, None], channels, axis=1)
+    return pg.sndarray.make_sound(samples)
+
+
+def note(index: int) -> float:
+    """Frequency (Hz) of the index-th color button, different for every index."""
+    if index < len(SIMON_NOTES):
+        return SIMON_NOTES[index]
+    octave, degree = divmod(index - len(SIMON_NOTES), len(PENTATONIC))
+    return 440.0 * 2 ** (octave + PENTATONIC[degree] / 12)
+
+
+def tone(frequency: float, duration: float, volume: float = 0.25) -> pg.mixer.Sound:
+    """A synthesized note : a soft square-ish wave (odd harmonics) with a short attack and release."""
+    mixer_frequency, _, channels = pg.mixer.get_init()
+    t = np.arange(int(duration * mixer_frequency)) / mixer_frequency
+    wave = sum(np.sin(2 * np.pi * frequency * harmonic * t) / harmonic for harmonic in (1, 3, 5))
+    envelope = np.minimum(1, np.minimum(t / 0.005, (duration - t) / 0.06))  # 5 ms attack, 60 ms release
+    samples = (wave * envelope * volume * 32767 / 1.5).astype(np.int16)
+    if channels > 1:
+        samples = np.repeat(samples[:, None], channels, axis=1)
+    return pg.mixer.Sound(buffer=samples.tobytes())  # the samples must be in the mixer format : 16 bit
+
+
+class VoicePool:
+    def __init__(self, channels: list[pg.mixer.Channel]):
+        self.channels = channels
+        self.started = [0] * len(channels)  # when the sound of each channel started (play count)
+        self.plays = 0
+
+    def play(self, sound: pg.mixer.Sound, *args, **kwargs) -> pg.mixer.Channel:
+        """Plays sound on a free channel, or instead of the oldest sound when they are all busy."""
+        for i, channel in enumerate(self.channels):
+            if not channel.get_busy():
+                break
+        else:
+            i = self.started.index(min(self.started))
+        self.plays += 1
+        self.started[i] = self.plays
+        self.channels[i].play(sound, *args, **kwargs)
+        return self.channels[i]
+
+
+_pools: dict[str, VoicePool] = {}
+
+
+def pool(category: str) -> VoicePool:
+    """The channels of a category, reserved on the first call (the mixer must be started)."""
+    reserved = sum(VOICES.values())
+    if pg.mixer.get_num_channels() != reserved + 8:  # first call, or the mixer was restarted
+        pg.mixer.set_num_channels(reserved + 8)  # 8 more for sounds played without a category
+        pg.mixer.set_reserved(reserved)
+        first = 0
+        for name, voices in VOICES.items():
+            _pools[name] = VoicePool([pg.mixer.Channel(i) for i in range(first, first + voices)])
+            first += voices
+    return _pools[category]
+
+
+def play(sound: pg.mixer.Sound, category: str, *args, **kwargs) -> pg.mixer.Channel:
+    """sound.play(*args, **kwargs), on the channels of category."""
+    return pool(category).play(sound, *args, **kwargs)
@@ -0,0 +1,341 @@
+import os
+
+# no window and no sound, has to be set before pygame starts
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import atexit
+import fnmatch
+import json
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pygame as pg
+
+import audio
+
+# python benchmark.py                   run everything and compare with benchmark_baseline.json
+# python benchmark.py "starfield*"      only the benchmarks matching the pattern
+# python benchmark.py --save-baseline   run everything and store the results as the new baseline
+# ops/sec are compared with the baseline, only a slowdown of more than --tolerance is reported as a regression.
+# Allocations are the Python ones (tracemalloc), the pixels of the surfaces are allocated by SDL and don't show up.
+
+BASELINE_PATH = "benchmark_baseline.json"
+SCREEN_SIZE = (1920, 1080)
+
+BENCHMARKS = {}  # name -> setup(), which prepares everything and returns the function to time
+
+
+def benchmark(name: str):
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+
+    return register
+
+
+def measure(func, min_time: float = 0.2, repeats: int = 5) -> dict:
+    """Best ops/sec over repeats runs of about min_time seconds each, then the allocations of one more run."""
+    func()  # warm up (lazy loading, caches...)
+    ops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(ops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / 4:
+            break
+        ops *= 2
+    ops = max(1, int(ops * min_time / max(elapsed, 1e-9)))
+
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(ops):
+            func()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()  # what the previous call left behind was allocated untraced, replace it by traced memory first
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    for _ in range(ops):
+        func()
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "ops_per_sec": round(ops / best, 2),
+        "peak_alloc_kb": round((peak - before) / 1024, 2),
+        "retained_bytes_per_op": round((after - before) / ops, 2),
+    }
+
+
+# minigames
+
+
+def _minigame(game):
+    """Puts the minigame in its place on a screen sized surface, and runs its setup."""
+    game.boundary = pg.Rect(410, 0, 550, 550)
+    game.update()
+    return game
+
+
+def _minigame_benchmarks(name: str, make_game):
+    @benchmark(f"{name}.update")
+    def update():
+        return _minigame(make_game()).update
+
+    @benchmark(f"{name}.draw")
+    def draw():
+        game = _minigame(make_game())
+        surface = pg.Surface(SCREEN_SIZE)
+        return lambda: game.draw(surface)
+
+
+def _register_minigames():
+    import globalSurfaces as gs
+    import minigame
+
+    _minigame_benchmarks("quiz", lambda: minigame.Quiz("a", ["a", "b", "c"], "?"))
+    _minigame_benchmarks("quiz_with_photo", lambda: minigame.Quiz("a", ["a", "b", "c"], "?", gs.RASINARI_PHOTO))
+    for size in (4, 6, 8, 16):
+        _minigame_benchmarks(f"memory_{size}x{size}", lambda size=size: minigame.Memory((size, size), gs.MEMORY_CARDS_1))
+    for size in (3, 4, 6, 32):
+        _minigame_benchmarks(
+            f"sliding_puzzle_{size}x{size}", lambda size=size: minigame.SlidingPuzzle((size, size), gs.LEVELS_SPRITES[0])
+        )
+    for length in (7, 13):
+        _minigame_benchmarks(f"color_sequence_{length}", lambda length=length: minigame.ColorSequenceMemory(length))
+
+
+def _register_sliding_solver():
+    import random
+    import slidingsolver
+
+    for size, distance in ((3, 20), (4, 30)):
+
+        @benchmark(f"sliding_solver_{size}x{size}.solve_{distance}")
+        def solve(size=size, distance=distance):
+            solver = slidingsolver.Solver(size, size)
+            board, _ = solver.board_at_distance(distance, random.Random(0))
+            return lambda: solver.solve(board)
+
+
+# starfield
+
+
+def _register_starfield():
+    from starfield import Starfield
+
+    for count in (120, 1000, 10_000, 100_000):
+
+        @benchmark(f"starfield_{count}.update")
+        def update(count=count):
+            return Starfield(*SCREEN_SIZE, num_stars=count, seed=0).update
+
+        @benchmark(f"starfield_{count}.draw")
+        def draw(count=count):
+            starfield = Starfield(*SCREEN_SIZE, num_stars=count, seed=0)
+            surface = pg.display.get_surface()
+            return lambda: starfield.draw(surface)
+
+
+# sprites
+
+
+@benchmark("spritesheet.get_img")
+def spritesheet_get_img():
+    from globalSurfaces import PLAYER_SPRITESHEET
+
+    sheet = PLAYER_SPRITESHEET.get()
+    return lambda: sheet.get_img((1, 0))
+
+
+@benchmark("spritesheet.get_img_flipped")
+def spritesheet_get_img_flipped():
+    from globalSurfaces import PLAYER_SPRITESHEET
+
+    sheet = PLAYER_SPRITESHEET.get()
+    return lambda: sheet.get_img((1, 0), flip_x=True)
+
+
+@benchmark("animation.get_frame")
+def animation_get_frame():
+    from globalSurfaces import PLAYER_ANIMATION
+
+    anim = PLAYER_ANIMATION.get().copy()
+    return lambda: anim.get_frame(flip_x=True)
+
+
+@benchmark("screen_fade.draw")
+def screen_fade_draw():
+    import sprite
+
+    fade = sprite.ScreenFade()
+    fade.start(0.012, start=0.5)
+    fade.update()
+    surface = pg.display.get_surface()
+    return lambda: fade.draw(surface)
+
+
+@benchmark("puzzle_piece.new")
+def puzzle_piece_new():
+    from puzzlepiece import PuzzlePiece
+
+    return lambda: PuzzlePiece(0, 0, [171, 148, 124], rotation=270)
+
+
+@benchmark("puzzle_piece.collect_draw")
+def puzzle_piece_collect_draw():
+    from puzzlepiece import PuzzlePiece
+
+    piece = PuzzlePiece(0, 0, [171, 148, 124], rotation=270)
+    piece.collect()
+    surface = pg.display.get_surface()
+
+    def draw():
+        piece.update()
+        if not piece.playing_fade_animation:  # start over
+            piece.collect()
+        piece.draw(surface)
+
+    return draw
+
+
+def _register_load_image():
+    import sprite
+
+    cache_dir = tempfile.mkdtemp(prefix="image-cache-")
+    atexit.register(shutil.rmtree, cache_dir, ignore_errors=True)  # the raw pixels of every photo, a few hundred MB
+    for file in sorted(os.listdir("assets/photos")):
+        path = f"assets/photos/{file}"
+
+        @benchmark(f"load_image.decode:{file}")
+        def decode(path=path):
+            def load():
+                previous, sprite.IMAGE_CACHE_DIR = sprite.IMAGE_CACHE_DIR, None
+                try:
+                    sprite.load_image(path)
+                finally:
+                    sprite.IMAGE_CACHE_DIR = previous
+
+            return load
+
+        @benchmark(f"load_image.cached:{file}")
+        def cached(path=path):
+            def load():
+                previous, sprite.IMAGE_CACHE_DIR = sprite.IMAGE_CACHE_DIR, cache_dir
+                try:
+                    sprite.load_image(path)
+                finally:
+                    sprite.IMAGE_CACHE_DIR = previous
+
+            return load
+
+
+# full frames
+
+
+def _register_levels():
+    import main
+
+    main.import_game_modules()
+    for i in range(len(main.LEVELS)):
+
+        @benchmark(f"game.draw:level_{i + 1}")
+        def game_draw(i=i):
+            game = main.Game(pg.display.get_surface(), headless=True, seed=0)
+            game.level = i
+            game.init_level(i)
+            for _ in range(60):  # let the fade in and the minigames setup happen
+                game.update()
+            return game.draw
+
+        @benchmark(f"game.update:level_{i + 1}")
+        def game_update(i=i):
+            game = main.Game(pg.display.get_surface(), headless=True, seed=0)
+            game.level = i
+            game.init_level(i)
+            for _ in range(60):
+                game.update()
+            return game.update
+
+
+def run(patterns: list[str]) -> dict[str, dict]:
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if patterns and not any(fnmatch.fnmatch(name, pattern) for pattern in patterns):
+            continue
+        results[name] = measure(setup())
+        print(f"{name:<40} {results[name]['ops_per_sec']:>12.1f} ops/s", flush=True)
+    return results
+
+
+def compare(results: dict[str, dict], baseline: dict[str, dict], tolerance: float) -> list[str]:
+    """Prints the results next to the baseline, returns the names of the benchmarks that got slower."""
+    regressions = []
+    print(f"\n{'benchmark':<40} {'ops/s':>12} {'baseline':>12} {'ratio':>7} {'peak KB':>9} {'B/op kept':>10}")
+    for name, result in results.items():
+        line = f"{name:<40} {result['ops_per_sec']:>12.1f}"
+        if name in baseline:
+            ratio = result["ops_per_sec"] / baseline[name]["ops_per_sec"]
+            line += f" {baseline[name]['ops_per_sec']:>12.1f} {ratio:>7.2f}"
+            if ratio < 1 - tolerance:
+                regressions.append(name)
+                line += "  SLOWER"
+        else:
+            line += f" {'-':>12} {'-':>7}"
+        print(line + f" {result['peak_alloc_kb']:>9.1f} {result['retained_bytes_per_op']:>10.1f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs the benchmarks and compares them with a baseline")
+    parser.add_argument("patterns", nargs="*", help="only run the benchmarks matching these (fnmatch) patterns")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="allowed slowdown before failing (0.3 = 30%%)")
+    args = parser.parse_args()
+
+    audio.pre_init()
+    pg.init()
+    pg.display.set_mode(SCREEN_SIZE)
+    _register_minigames()
+    _register_sliding_solver()
+    _register_starfield()
+    _register_load_image()
+    _register_levels()
+
+    results = run(args.patterns)
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):  # keep the benchmarks that weren't run this time
+            with open(args.baseline) as file:
+                baseline = json.load(file)["results"]
+        baseline.update(results)
+        machine = {"python": platform.python_version(), "pygame": pg.version.ver, "machine": platform.machine()}
+        with open(args.baseline, "w") as file:
+            json.dump({"machine": machine, "results": baseline}, file, indent=2)
+        print(f"\nbaseline saved to {args.baseline}")
+        return 0
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)["results"]
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) : {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+import hashlib
+import os
+
+# files the game makes once and keeps in .cache, next to where it is run from (decoded images, trimmed sounds,
+# solver tables). Deleting the .cache folder clears everything, or set IMAGE_CACHE_DIR / SOUND_CACHE_DIR /
+# PATTERN_CACHE_DIR to None to turn a cache off.
+# they are only an optimization : a missing, stale or unwritable cache file just means doing the work again
+# a file made from a source is named <source>-<version>-<params> : writing a new version of a source removes
+# the older ones, and a directory can have a size limit, the least recently used files going first
+
+
+def _digest(*parts) -> str:
+    return hashlib.sha1("|".join(map(str, parts)).encode()).hexdigest()[:16]
+
+
+def cache_path(directory: str, source: str, *params, suffix: str) -> str:
+    """Path of the cache file made from the file source with params, a new path once source changes."""
+    stat = os.stat(source)
+    name = "-".join(
+        (_digest(os.path.abspath(source)), _digest(stat.st_mtime_ns, stat.st_size), _digest(*params))
+    )
+    return os.path.join(directory, name + suffix)
+
+
+def read_file(path: str) -> bytes | None:
+    """The content of a cache file, None when there is none."""
+    try:
+        with open(path, "rb") as file:
+            data = file.read()
+    except OSError:
+        return None
+    touch(path)
+    return data
+
+
+def touch(path: str) -> None:
+    """Marks a cache file as just used, call it after reading the file another way than read_file."""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def write_file(path: str, *chunks, max_bytes: int | None = None) -> None:
+    """Writes the chunks (bytes-like) to path, atomically : a crash never leaves a half written cache file.
+    Then removes the older versions of the same source, and the least recently used files of the directory
+    while it holds more than max_bytes."""
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as file:
+            for chunk in chunks:
+                file.write(chunk)
+        os.replace(tmp_path, path)
+        _evict(path, max_bytes)
+    except OSError:
+        pass  # the cache is only an optimization
+
+
+def _evict(path: str, max_bytes: int | None):
+    directory, name = os.path.split(path)
+    parts = name.split("-")
+    files = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.name == name or not entry.is_file() or entry.name.endswith(".tmp"):
+                continue
+            other = entry.name.split("-")
+            if len(parts) == 3 and len(other) == 3 and other[0] == parts[0] and other[1] != parts[1]:
+                os.remove(entry.path)  # made from an older version of the source
+                continue
+            stat = entry.stat()
+            files.append((stat.st_mtime_ns, stat.st_size, entry.path))
+
+    if max_bytes is None:
+        return
+    used = os.path.getsize(path) + sum(size for _, size, _ in files)
+    for _, size, file_path in sorted(files):  # least recently used first
+        if used <= max_bytes:
+            break
+        os.remove(file_path)
+        used -= size
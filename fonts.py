@@ -0,0 +1,41 @@
+from collections import OrderedDict
+import pygame as pg
+
+# pg.font.SysFont scans the system font list and font.render rasterizes every glyph,
+# both are way too slow to be called every frame, so everything goes through here
+
+_fonts: dict[tuple, pg.font.Font] = {}
+_rendered: OrderedDict[tuple, pg.Surface] = OrderedDict()
+MAX_RENDERED_TEXTS = 256
+
+
+def get_font(family: str = "Arial", size: int = 23) -> pg.font.Font:
+    """Returns the font for (family, size), only resolved the first time.
+    family can be a system font name or the path to a .ttf/.otf file."""
+    key = (family, size)
+    font = _fonts.get(key)
+    if font is None:
+        if family.lower().endswith((".ttf", ".otf")):
+            font = pg.font.Font(family, size)
+        else:
+            font = pg.font.SysFont(family, size)
+        _fonts[key] = font
+    return font
+
+
+def render_text(text: str, color, size: int = 23, family: str = "Arial", antialias=True) -> pg.Surface:
+    """Same as get_font(family, size).render(text, antialias, color), but the result is cached.
+    The returned surface is shared : don't draw on it."""
+    if not isinstance(color, str):
+        color = tuple(color)  # lists aren't hashable
+    key = (family, size, text, color, antialias)
+    surf = _rendered.get(key)
+    if surf is not None:
+        _rendered.move_to_end(key)
+        return surf
+
+    surf = get_font(family, size).render(text, antialias, color)
+    _rendered[key] = surf
+    if len(_rendered) > MAX_RENDERED_TEXTS:
+        _rendered.popitem(last=False)
+    return surf
@@ -0,0 +1,63 @@
+import pygame as pg
+import time
+
+# the game logic moves by a fixed amount per update (5 px, 5 alpha...), so updates have to happen at a fixed rate
+# whatever the frame rate is : the clock says how many updates to run before drawing each frame
+
+_running_clock = None  # the last clock made, read by game_time()
+
+
+def game_time() -> float:
+    """Replaces time.time() in the game logic : seconds of game time, which only moves with the updates,
+    so the game plays the same whatever the frame rate (and replays stay in sync)."""
+    if _running_clock is None:
+        return time.perf_counter()
+    return _running_clock.sim_time
+
+
+class GameClock:
+    def __init__(self, step_rate: int = 60, render_fps: int = 60, max_steps: int = 5, unthrottled=False):
+        """step_rate : updates per second of game time, render_fps : frame rate cap (0 for no cap),
+        max_steps : most updates run for one frame, when the game is too far behind the extra time is dropped.
+        unthrottled : never waits and runs exactly one update per frame, for headless runs and benchmarks."""
+        self.step = 1 / step_rate
+        self.render_fps = render_fps
+        self.max_steps = max_steps
+        self.unthrottled = unthrottled
+        self.clock = pg.time.Clock()
+        self.accumulator = 0.0
+        self.sim_time = 0.0  # game time, advanced by step for each update
+        self.alpha = 0.0  # how far we are between the last update and the next one, to interpolate drawing
+
+        global _running_clock
+        _running_clock = self
+
+    def tick(self) -> int:
+        """Waits for the next frame and returns how many updates to run."""
+        if self.unthrottled:
+            self.clock.tick()  # still measures the fps
+            self.alpha = 1.0
+            return 1
+        self.accumulator += self.clock.tick(self.render_fps) / 1000
+        steps = int(self.accumulator / self.step)
+        if steps > self.max_steps:  # frame skip cap, avoids the spiral of death on a long stall
+            steps = self.max_steps
+            self.accumulator = steps * self.step
+        self.accumulator -= steps * self.step
+        self.alpha = self.accumulator / self.step
+        return steps
+
+    def steps(self):
+        """for _ in clock.steps(): update() - waits for the next frame and runs the updates it needs."""
+        for _ in range(self.tick()):
+            self.sim_time += self.step
+            yield
+
+    def reset(self):
+        """Forgets the time spent since the last tick (after a loading or a blocking screen)."""
+        self.clock.tick()
+        self.accumulator = 0.0
+        self.alpha = 1.0 if self.unthrottled else 0.0
+
+    def get_fps(self) -> float:
+        return self.clock.get_fps()
@@ -1,54 +1,59 @@
 import sprite
 import pygame as pg
+from assetregistry import AssetRegistry
 
 # this file is used to store global surfaces that are used in multiple files
+# everything here is a lazy handle : call .get() to get the real surface (sounds can be .play()-ed directly)
+# nothing is decoded at import time, use REGISTRY.warm_up() to load things ahead of time
 
+REGISTRY = AssetRegistry()
 
 LEVELS_SPRITES = [
-    sprite.load_image("assets/photos/4.png"),
-    sprite.load_image("assets/photos/2.png"),
-    sprite.load_image("assets/photos/6.png"),
+    REGISTRY.image("assets/photos/4.png"),
+    REGISTRY.image("assets/photos/2.png"),
+    REGISTRY.image("assets/photos/6.png"),
 ]
 
-PUZZLE_PIECE = sprite.load_image("assets/images/puzzlepiece.png", 1.1)
-BUTTON_UP = sprite.load_image("assets/images/buttonUp.png", 0.5)
-BUTTON_DOWN = sprite.load_image("assets/images/buttonDown.png", 0.5)
+PUZZLE_PIECE = REGISTRY.image("assets/images/puzzlepiece.png", 1.1)
+BUTTON_UP = REGISTRY.image("assets/images/buttonUp.png", 0.5)
+BUTTON_DOWN = REGISTRY.image("assets/images/buttonDown.png", 0.5)
 
 MEMORY_CARDS_1 = [
-    sprite.load_image(f"assets/mem images/mem{i}.jpg", 0.3) for i in range(1, 9)
+    REGISTRY.image(f"assets/mem images/mem{i}.jpg", 0.3) for i in range(1, 9)
 ]
 
-RASINARI_PHOTO = sprite.load_image("assets/photos/rasinari.JPG")
-PHOTO_OF_2011 = sprite.load_image("assets/photos/2011.JPG")
-CHEESE_PHOTO = sprite.load_image("assets/photos/fromage.JPG")
-LOUIS_PHOTO = sprite.load_image("assets/photos/louis.jpg")
-PAPA_PERRUQUE = sprite.load_image("assets/photos/1.png")
-HISOITRE_PHOTO = sprite.load_image("assets/photos/histoire.jpg")
-
-PLAYER_SPRITESHEET = sprite.Spritesheet(
-    sprite.load_image("assets/images/spritesheetMC.png", 0.2),
-    (int(500 / 5), int(1080 / 5)),
+RASINARI_PHOTO = REGISTRY.image("assets/photos/rasinari.JPG")
+PHOTO_OF_2011 = REGISTRY.image("assets/photos/2011.JPG")
+CHEESE_PHOTO = REGISTRY.image("assets/photos/fromage.jpg")
+LOUIS_PHOTO = REGISTRY.image("assets/photos/louis.JPG")
+PAPA_PERRUQUE = REGISTRY.image("assets/photos/1.png")
+HISOITRE_PHOTO = REGISTRY.image("assets/photos/histoire.jpg")
+
+PLAYER_SPRITESHEET = REGISTRY.lazy(
+    lambda: sprite.Spritesheet(
+        sprite.load_image("assets/images/spritesheetMC.png", 0.2),
+        (int(500 / 5), int(1080 / 5)),
+    ),
+    "PLAYER_SPRITESHEET",
+)
+PLAYER_ANIMATION = REGISTRY.lazy(
+    lambda: sprite.Animation(PLAYER_SPRITESHEET.get(), 0, 4, speed=10, repeat=True),
+    "PLAYER_ANIMATION",
 )
-PLAYER_ANIMATION = sprite.Animation(PLAYER_SPRITESHEET, 0, 4, speed=10, repeat=True)
-
 
-RED_BUTTON_SOUND = pg.mixer.Sound("assets/sound/red.wav")
-YELLOW_BUTTON_SOUND = pg.mixer.Sound("assets/sound/yellow.wav")
-BLUE_BUTTON_SOUND = pg.mixer.Sound("assets/sound/blue.wav")
-GREEN_BUTTON_SOUND = pg.mixer.Sound("assets/sound/green.wav")
 
-BUTTON_PUSHED_SOUND = pg.mixer.Sound("assets/sound/button_pushed.wav")
+BUTTON_PUSHED_SOUND = REGISTRY.sound("assets/sound/button_pushed.wav")
 
-ACHIEVE_LEVEL_SOUND = pg.mixer.Sound("assets/sound/achieve_level.mp3")
-START_GAME_SOUND = pg.mixer.Sound("assets/sound/start_of_game_alt.mp3")
-ACHIEVE_PUZZLE_SOUND = pg.mixer.Sound("assets/sound/achieve_puzzle.wav")
+ACHIEVE_LEVEL_SOUND = REGISTRY.sound("assets/sound/achieve_level.mp3", "jingles")
+START_GAME_SOUND = REGISTRY.sound("assets/sound/start_of_game_alt.mp3")
+ACHIEVE_PUZZLE_SOUND = REGISTRY.sound("assets/sound/achieve_puzzle.wav", "jingles")
 
-ERROR_MEMORY_SOUND = pg.mixer.Sound("assets/sound/error_memory.wav")
-WIN_MEMORY_SOUND = pg.mixer.Sound("assets/sound/win_memory.wav")
+ERROR_MEMORY_SOUND = REGISTRY.sound("assets/sound/error_memory.wav", "memory")
+WIN_MEMORY_SOUND = REGISTRY.sound("assets/sound/win_memory.wav", "memory")
 
-MUSIC = pg.mixer.music.load("assets/sound/music.wav")
+MUSIC = pg.mixer.music.load("assets/sound/music.wav")  # streamed, not decoded up front
 pg.mixer.music.set_volume(0.05)
 
-WALLPAPER_START = pg.image.load(
-    "assets\start_assets\wallpaper.jpg"
+WALLPAPER_START = REGISTRY.image(
+    "assets/start_assets/wallpaper.jpg"
 )  # image has to be 1920/1080, it doesn't get resized
@@ -1,18 +1,48 @@
 import math
+import random
 
 
 class Game:
-    def __init__(self, display):
+    def __init__(
+        self,
+        display,
+        dirty_rendering=False,
+        render_fps=60,
+        headless=False,
+        frame_limit=None,
+        level_limit=None,
+        level_frame_limit=None,
+        seed=None,
+        input_source=None,
+    ):
+        """dirty_rendering only redraws and pushes the parts of the screen that changed (see renderer.py).
+        render_fps only changes how often the game is drawn, the game logic always runs at 60 updates per second.
+        headless never waits (one update per frame, as fast as possible) and skips the title screen.
+        The game stops after frame_limit frames or level_limit levels,
+        and a level is finished after level_frame_limit frames (like the secret keybind).
+        seed seeds the random module and the minigames (a random seed by default), input_source gives the keys and events
+        to the game (the keyboard by default, see replay.py)."""
+        self.seed = random.getrandbits(64) if seed is None else seed
+        random.seed(self.seed)  # before anything random is made, so a replay gets the same game
+        self.input = input_source or LiveInput()
         pg.init()
         self.screen: pg.Surface = display
         pg.display.set_caption("TOP SECRET")
-        self.clock = pg.time.Clock()
+        self.headless = headless
+        self.clock = GameClock(step_rate=60, render_fps=0 if headless else render_fps, unthrottled=headless)
+        self.frames = 0
+        self.level_frames = 0
+        self.frame_limit = frame_limit
+        self.level_limit = level_limit
+        self.level_frame_limit = level_frame_limit
         self.fade = sprite.ScreenFade()
+        self.fade_drawn = False  # drawn last frame, it has to be cleared from the whole screen once over
 
         self.player = Player(400, 300)
         self.level = 0
         self.running = True
         self.origin = (410, 0)
+        self.play_area = pg.Rect(self.origin, (1100, 1100))  # background, puzzle pieces and minigames
         self.secret_activated = False
         self.secret_timer = 0
 
@@ -27,8 +57,44 @@ class Game:
             self.screen.get_width(), self.screen.get_height(), num_stars=120
         )
 
-    def init_level(self, level_ind: int):
-        self.original_background = LEVELS[level_ind].background
+        self.preloader = LevelPreloader()
+        self.level_assets = []
+
+        self.renderer = None
+        if dirty_rendering:
+            from renderer import DirtyRectRenderer
+
+            self.renderer = DirtyRectRenderer(self.draw_scene, self.starfield)
+
+    def preload_level(self, level_ind: int):
+        """Starts loading the level on the preloader threads, init_level takes the result of the job."""
+        return self.preloader.preload(LEVELS[level_ind], self.prepare_level)
+
+    def prepare_level(self, level: "LevelConfig"):
+        """Loads everything the level needs. Called from the preloader threads, so it must not touch the game state."""
+        background = resolve(level.background)
+        for asset in level.assets():
+            asset.get()
+        return level, background, self.make_puzzle_pieces()
+
+    def allow_events(self):
+        """Only the events someone reacts to get into the queue, SDL drops the others (mouse motion, audio devices...)."""
+        pg.event.set_blocked(None)
+        pg.event.set_allowed([pg.QUIT, pg.KEYDOWN, pg.KEYUP] + list(self.puzzle_manager.event_types()))
+
+    def init_level(self, level_ind: int, prepared=None):
+        if prepared is None:  # not preloaded (or the preload got cancelled)
+            prepared = self.prepare_level(LEVELS[level_ind]())
+        level, self.original_background, self.puzzle_pieces = prepared
+        # the level's own random, whatever the preloader threads did with the global one before
+        for i, game in enumerate(level.minigames):
+            game.rng = random.Random(hash((self.seed, level_ind, i)))
+
+        # free the assets only the previous level was using
+        new_assets = level.assets()
+        REGISTRY.unload([asset for asset in self.level_assets if asset not in new_assets])
+        self.level_assets = new_assets
+
         self.background = self.original_background.subsurface(
             (
                 max(0, self.original_background.get_rect().centerx - 550),
@@ -38,9 +104,42 @@ class Game:
             )
         )
         side_without_bitoniau = 550
+
+        boundaries = []
+        for i in range(4):
+            boundaries.append(
+                pg.Rect(
+                    (
+                        self.origin[0] + side_without_bitoniau * (i % 2),
+                        self.origin[1] + side_without_bitoniau * (i // 2),
+                    ),
+                    (side_without_bitoniau, side_without_bitoniau),
+                )
+            )
+
+        self.puzzle_manager = PuzzleManager(
+            boundaries, self.puzzle_pieces, level.minigames
+        )
+        self.allow_events()
+        self.static_layer = StaticLayer(self.play_area, self.bake_static_layer)
+        for piece, _ in self.puzzle_pieces:
+            piece.on_collect = self.static_layer.invalidate
+        if self.renderer:
+            self.renderer.invalidate()
+
+    def bake_static_layer(self, layer: "pg.Surface", offset):
+        """The cropped background and the pieces that are not collected yet, see renderer.StaticLayer."""
+        blit_premultiplied(
+            layer, self.background, (self.origin[0] + offset[0], self.origin[1] + offset[1])
+        )
+        for piece in self.puzzle_manager.idle_pieces():
+            blit_premultiplied(layer, piece.image, piece.rect.move(offset))
+
+    def make_puzzle_pieces(self):
+        side_without_bitoniau = 550
         bitoniau = 88
         piece_size = (side_without_bitoniau, side_without_bitoniau)
-        self.puzzle_pieces = [
+        return [
             (
                 PuzzlePiece(*self.origin, [162, 112, 112], rotation=0),
                 pg.Rect(self.origin, piece_size),
@@ -84,90 +183,137 @@ class Game:
             ),
         ]
 
-        boundaries = []
-        for i in range(4):
-            boundaries.append(
-                pg.Rect(
-                    (
-                        self.origin[0] + side_without_bitoniau * (i % 2),
-                        self.origin[1] + side_without_bitoniau * (i // 2),
-                    ),
-                    (side_without_bitoniau, side_without_bitoniau),
-                )
-            )
-
-        self.puzzle_manager = PuzzleManager(
-            boundaries, self.puzzle_pieces, LEVELS[level_ind].minigames
-        )
-
     def run(self):
         import start
 
-        start.run(self.clock, self.screen)
+        next_level = self.preload_level(self.level)  # loads behind the title screen
+        if self.headless:
+            start.run(self.clock.clock, self.screen, fps=0, auto_start=True)
+        else:
+            start.run(self.clock.clock, self.screen)
         self.fade.start(0.012, start=math.pi / 2)  # Fade in at start
-        while self.level < len(LEVELS) and self.running:
+        last_level = len(LEVELS)
+        if self.level_limit is not None:
+            last_level = min(last_level, self.level + self.level_limit)
+        while self.level < last_level and self.running:
             self.finished_level = False
-            self.init_level(self.level)
+            self.level_frames = 0
+            self.init_level(self.level, next_level.result() if next_level else None)
+            next_level = None
+            if self.level + 1 < last_level:
+                next_level = self.preload_level(self.level + 1)
+            self.clock.reset()  # loading the level isn't game time
             while not self.finished_level and self.running:
-                self.handle_events()
-                self.update()
-                self.draw()
-                self.clock.tick(60)
-
-            if self.finished_level:
+                for _ in self.clock.steps():
+                    with PROFILER.section("handle_events"):
+                        self.handle_events()
+                    with PROFILER.section("update"):
+                        self.update()
+                    if self.finished_level or not self.running:
+                        break
+                with PROFILER.section("draw"):
+                    self.draw()
+                self.frame_done()
+                if self.level_frame_limit is not None and self.level_frames >= self.level_frame_limit:
+                    self.finished_level = True
+
+            if self.finished_level and self.running:
                 self.ACHIEVE_LEVEL_SOUND.play()
                 self.animate_background_grow()
 
             self.fade.start(0.012, start=math.pi / 2)  # Fade out at end of level
 
             self.level += 1
+
+        if next_level:
+            next_level.cancel()
+        self.preloader.shutdown()
         pg.quit()
 
+    def frame_done(self):
+        """Counts the frames shown, and stops the game once frame_limit is reached."""
+        self.frames += 1
+        self.level_frames += 1
+        if self.frame_limit is not None and self.frames >= self.frame_limit:
+            self.running = False
+
     def handle_events(self):
-        self.player.handle_movement_inputs()
+        keys, events = self.input.read()
+        self.player.handle_movement_inputs(keys)
 
-        for event in pg.event.get():
+        for event in events:
             if event.type == pg.QUIT:
                 self.running = False
 
             # Enhanced secret keybind to complete level: Ctrl+Shift+C
             if event.type == pg.KEYDOWN:
                 if event.key == pg.K_c:
-                    keys = pg.key.get_pressed()
                     if keys[pg.K_LCTRL] and keys[pg.K_LSHIFT]:
                         if not self.finished_level:
                             self.finished_level = True
+                if event.key == pg.K_F3:
+                    PROFILER.toggle_hud()
 
             self.puzzle_manager.handle_event(event)
 
             self.player.handle_events(event)
 
     def update(self):
-        self.player.update()
-        self.puzzle_manager.update()
+        with PROFILER.section("player.update"):
+            self.player.update()
+        with PROFILER.section("puzzle_manager.update"):
+            self.puzzle_manager.update()
         if self.puzzle_manager.is_all_pieces_collected():
             self.finished_level = True
-        self.starfield.update()
-        self.fade.update()
+        with PROFILER.section("starfield.update"):
+            self.starfield.update()
+        with PROFILER.section("fade.update"):
+            self.fade.update()
 
     def draw(self):
-        # Draw black space background with stars
-        self.screen.fill((0, 0, 0))  # Black space
-        self.starfield.draw(self.screen)  # Draw animated stars
-
-        self.screen.blit(self.background, self.origin)
-        self.puzzle_manager.draw(self.screen)
-        self.player.draw(self.screen)
-
-        # show fps
-        """fps = int(self.clock.get_fps())
-        font = pg.font.SysFont("Arial", 30)
-        fps_surf = font.render(f"FPS: {fps}", True, (255, 0, 255))
-        self.screen.blit(fps_surf, (10, 10))"""
-
-        self.fade.draw(self.screen)
+        self.player.interpolation = self.clock.alpha
+        PROFILER.refresh_hud(self.clock.get_fps())
+        if self.renderer:
+            if self.fade.playing or self.fade_drawn:
+                self.renderer.invalidate()  # the fade covers the whole screen
+            self.fade_drawn = self.fade.playing
+            with PROFILER.section("dirty render"):
+                self.renderer.render(self.screen, self.dirty_rects(), [self.play_area])
+            return
+
+        self.draw_scene(self.screen)
+        with PROFILER.section("display.flip"):
+            pg.display.flip()
 
-        pg.display.flip()
+    def draw_scene(self, surface: "pg.Surface"):
+        # Draw black space background with stars
+        surface.fill((0, 0, 0))  # Black space
+        # Draw animated stars, with the dirty rect renderer they are only drawn around the play area
+        with PROFILER.section("starfield.draw"):
+            self.starfield.draw(surface, [self.play_area] if self.renderer else [])
+
+        with PROFILER.section("static_layer.draw"):
+            self.static_layer.draw(surface)  # background + idle puzzle pieces
+        with PROFILER.section("puzzle_manager.draw"):
+            self.puzzle_manager.draw(surface, idle_pieces=False)
+        with PROFILER.section("player.draw"):
+            self.player.draw(surface)
+
+        with PROFILER.section("fade.draw"):
+            self.fade.draw(surface)
+
+        # F3 : fps and frame times
+        PROFILER.draw_hud(surface)
+
+    def dirty_rects(self) -> "list[pg.Rect]":
+        """Everything that changed since the last frame, for the dirty rect renderer."""
+        # outside of the play area the stars move behind the player, so it is redrawn every frame
+        player_over_stars = not self.play_area.contains(self.player.rect)
+        return (
+            self.puzzle_manager.dirty_rects()
+            + self.player.dirty_rects(force=player_over_stars)
+            + PROFILER.hud_rects()
+        )
 
     def animate_background_grow(self):
         grow_steps = 30
@@ -177,7 +323,13 @@ class Game:
         target_rect = orig_rect.copy()
         # Start from the cropped background
         start_rect = self.background.get_rect(topleft=self.origin)
-        for step in range(1, grow_steps + 1):
+        self.clock.reset()
+        step = 0
+        while step < grow_steps and self.running:
+            for _ in self.clock.steps():
+                if step < grow_steps:
+                    step += 1
+                    self.starfield.update()
             lerp = step / grow_steps
 
             # Interpolate rect
@@ -196,21 +348,25 @@ class Game:
                 center=(self.screen.get_rect().centerx, scaled_bg.get_height() // 2)
             )
             self.screen.fill((0, 0, 0))
-            self.starfield.update()
             self.starfield.draw(self.screen)
             self.screen.blit(scaled_bg, rect)
 
             pg.display.flip()
-            self.clock.tick(60)
-        # Wait a few seconds
-        start_time = time.time()
+            self.frame_done()
+        # Wait a few seconds (of game time)
+        waited = 0
         fade = sprite.ScreenFade()
 
-        while time.time() - start_time < wait_seconds or fade.is_ascending():
+        while (waited < wait_seconds or fade.is_ascending()) and self.running:
+            for _ in self.clock.steps():
+                self.starfield.update()
+                fade.update()
+                waited += self.clock.step
+                if waited >= wait_seconds and not fade.playing:
+                    fade.start(0.012)
+
             self.screen.fill((0, 0, 0))
-            self.starfield.update()
             self.starfield.draw(self.screen)
-            fade.update()
 
             self.screen.blit(
                 orig_bg,
@@ -220,25 +376,109 @@ class Game:
             )
             fade.draw(self.screen)
             pg.display.flip()
-            self.clock.tick(60)
+            self.frame_done()
 
-            if time.time() - start_time >= wait_seconds and not fade.playing:
-                fade.start(0.012)
 
-
-if __name__ == "__main__":
+def import_game_modules():
+    """The game modules load things when imported (the music needs the mixer),
+    so they are imported here once pygame is started, into this module like imports at the top would be.
+    Also lets other scripts (benchmark.py) use Game."""
+    global pg, PuzzlePiece, PuzzleManager, Player, LEVELS, LevelConfig, sprite, resolve, REGISTRY
+    global LevelPreloader, StaticLayer, blit_premultiplied, GameClock, LiveInput, InputRecorder, InputReplayer
+    global PROFILER
     import pygame as pg
-
-    pg.init()
-    display = pg.display.set_mode(
-        (1920, 1080), flags=pg.SCALED, vsync=1
-    )  # scaled to fix screen tearing (found on reddit)
     from puzzlepiece import PuzzlePiece
     from puzzlemanager import PuzzleManager
     from player import Player
     from levelconfig import LEVELS, LevelConfig
     import sprite
+    from assetregistry import resolve
+    from globalSurfaces import REGISTRY
+    from preloader import LevelPreloader
+    from renderer import StaticLayer, blit_premultiplied
+    from gameclock import GameClock
+    from replay import LiveInput, InputRecorder, InputReplayer
+    from profiler import PROFILER
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="no window, no sound and no frame cap (benchmarks, CI)",
+    )
+    parser.add_argument("--frames", type=int, help="quit after this many frames")
+    parser.add_argument("--levels", type=int, help="quit after this many levels")
+    parser.add_argument(
+        "--level-frames", type=int, help="finish each level after this many frames"
+    )
+    parser.add_argument(
+        "--dirty", action="store_true", help="use the dirty rect renderer"
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="FILE",
+        help="time the parts of each frame and write them to FILE on exit (.csv or .json)",
+    )
+    parser.add_argument("--seed", type=int, help="seed of the random module")
+    parser.add_argument("--record", metavar="FILE", help="record the session in FILE")
+    parser.add_argument(
+        "--replay", metavar="FILE", help="play a recorded session, as fast as possible"
+    )
+    args = parser.parse_args()
+    if args.headless:
+        # has to be set before pygame starts
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+    import pygame as pg
+    import audio
+
+    audio.pre_init()  # small mixer buffer, before pg.init starts the mixer
+    pg.init()
+    if args.headless:
+        display = pg.display.set_mode((1920, 1080))
+    else:
+        display = pg.display.set_mode(
+            (1920, 1080), flags=pg.SCALED, vsync=1
+        )  # scaled to fix screen tearing (found on reddit)
+    import_game_modules()
     import time
 
-    game = Game(display)
-    game.run()
+    seed = args.seed
+    input_source = None
+    if args.replay:
+        input_source = InputReplayer(args.replay)
+        seed = input_source.seed
+    elif args.record:
+        if seed is None:
+            seed = random.getrandbits(64)
+        input_source = InputRecorder(args.record, seed)
+
+    game = Game(
+        display,
+        dirty_rendering=args.dirty,
+        headless=args.headless or bool(args.replay),  # a replay doesn't wait either
+        frame_limit=args.frames,
+        level_limit=args.levels,
+        level_frame_limit=args.level_frames,
+        seed=seed,
+        input_source=input_source,
+    )
+    PROFILER.enabled = bool(args.profile)
+    start_time = time.perf_counter()
+    try:
+        game.run()
+    finally:
+        game.input.close()
+        if args.profile:
+            PROFILER.dump(args.profile)
+    if args.headless or args.replay:
+        elapsed = time.perf_counter() - start_time
+        print(
+            f"{game.frames} frames in {elapsed:.2f}s, {elapsed / max(game.frames, 1) * 1000:.2f} ms per frame"
+        )
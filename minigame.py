@@ -1,10 +1,43 @@
 import pygame as pg
 from puzzlepiece import PuzzlePiece
-from time import time
+from assetregistry import AssetHandle, resolve
+from sprite import scaled, widget_sprite
+from fonts import render_text
+from gameclock import game_time
+from audio import note
+from slidingsolver import Solver, random_board
+import math
 import random
 
+INTERACT_EVENT = pg.USEREVENT + 0  # posted by the player (space), pos is where it happened
+RESET_EVENT = pg.USEREVENT + 1  # puts the buttons back up
+POSITIONAL_EVENTS = {INTERACT_EVENT}  # only sent to the minigame under their pos
+
+
+class MemoryCard:
+    __slots__ = ("rect", "image", "resized", "flipped", "matched", "pair_id")
+
+    def __init__(self, rect: pg.Rect, image, resized, pair_id: int):
+        self.rect = rect
+        self.image = image
+        self.resized = resized  # image scaled to the card
+        self.flipped = False
+        self.matched = False
+        self.pair_id = pair_id  # same for the cards showing the same picture
+
+
+class PuzzleTile:
+    __slots__ = ("area", "correct")
+
+    def __init__(self, area: pg.Rect, correct: tuple[int, int]):
+        self.area = area  # part of the puzzle image shown on the tile
+        self.correct = correct  # grid position where it belongs
+
 
 class GenericMinigame:
+    # the event types handle_event reacts to, the puzzle manager doesn't send it anything else
+    EVENT_TYPES = frozenset()
+
     def __init__(self, name="Minigame"):
         self.boundary = None  # Will be set by PuzzleManager
         self.completed = False
@@ -12,34 +45,58 @@ class GenericMinigame:
         self.is_completed_countdown = None
         self.fade_alpha = 255
         self.minigame_screenshot = None
+        self.dirty = True  # looks different since the last draw, for the dirty rect renderer
+        # where the minigame draws its random things, Game gives each level its own seeded one
+        # (the levels are built on the preloader threads, the global random module would depend on their timing)
+        self.rng = random
+
+    def mark_dirty(self):
+        self.dirty = True
 
     def setup(self):
         pass  # To be implemented by subclasses if needed
 
+    def assets(self) -> list[AssetHandle]:
+        """Lazy assets used by the minigame, so they can be loaded before the level starts."""
+        return []
+
     def update(self):
         if self.completed:
             return
-        if self.is_completed_countdown and time() >= self.is_completed_countdown:
+        if self.is_completed_countdown:
+            self.mark_dirty()  # fading out
+            # the fade is advanced here and not in draw, so the game plays the same whatever the frame rate
+            self.fade_alpha -= 5
+            if self.fade_alpha <= 0:
+                self.fade_alpha = 0
+                self.completed = True
+                return
+        if (
+            self.is_completed_countdown
+            and game_time() >= self.is_completed_countdown
+        ):
             self.completed = True
 
+    def wake_time(self) -> float | None:
+        """When update has to run again (game time), asked after each update :
+        a time already passed to run on every step, None when only an event can change
+        something. Override it when update does something on its own (timers...)."""
+        if self.is_completed_countdown and not self.completed:
+            return 0  # fading out
+        return None
+
     def draw(self, surface: pg.Surface, screenshot_mode=False):
         if (
             self.is_completed_countdown
-            and self.fade_alpha == 255
+            and self.minigame_screenshot is None
             and not screenshot_mode
         ):
             self.minigame_screenshot = pg.Surface(surface.get_size(), pg.SRCALPHA)
             self.draw(self.minigame_screenshot, screenshot_mode=True)
-            self.fade_alpha -= 1
 
         if self.is_completed_countdown and self.fade_alpha > 0 and not screenshot_mode:
-            self.fade_alpha -= 5
             self.minigame_screenshot.set_alpha(self.fade_alpha)
             surface.blit(self.minigame_screenshot, (0, 0))
-
-            if self.fade_alpha <= 0:
-                self.fade_alpha = 0
-                self.completed = True
             return
         elif self.completed and not screenshot_mode:
             return
@@ -49,6 +106,8 @@ class GenericMinigame:
 
 
 class Quiz(GenericMinigame):
+    EVENT_TYPES = frozenset({INTERACT_EVENT, RESET_EVENT})
+
     def __init__(
         self,
         right_answer,
@@ -63,6 +122,9 @@ class Quiz(GenericMinigame):
         self.caption_image = caption_image
         self.buttons = []
 
+    def assets(self):
+        return [self.caption_image] if isinstance(self.caption_image, AssetHandle) else []
+
     def setup(self):
         if not self.boundary:
             return
@@ -72,8 +134,8 @@ class Quiz(GenericMinigame):
 
         self.buttons: list[Button] = []
         num_answers = len(self.possible_answers)
-        button_width = BUTTON_UP.get_width()
-        button_height = BUTTON_UP.get_height()
+        button_width = BUTTON_UP.get().get_width()
+        button_height = BUTTON_UP.get().get_height()
         spacing = 60
 
         total_width = num_answers * button_width + (num_answers - 1) * spacing
@@ -97,36 +159,50 @@ class Quiz(GenericMinigame):
 
         for button in self.buttons:
             if button.state == "DOWN" and button.text == self.right_answer:
-                self.is_completed_countdown = time() + 1
+                self.is_completed_countdown = game_time() + 1
 
         for button in self.buttons:
             if (
                 button.state == "DOWN"
                 and button.last_pressed_time
-                and time() - button.last_pressed_time >= 1
+                and game_time() - button.last_pressed_time >= 1
             ):
                 button.reset()
+                self.mark_dirty()
                 break
 
+    def wake_time(self):
+        if self.is_completed_countdown:
+            return super().wake_time()
+        # the pressed buttons go back up after a second
+        return min(
+            (
+                button.last_pressed_time + 1
+                for button in self.buttons
+                if button.state == "DOWN" and button.last_pressed_time
+            ),
+            default=None,
+        )
+
     def draw(self, surface: pg.Surface, screenshot_mode=False):
         super().draw(surface, screenshot_mode)
         if self.completed and not screenshot_mode:
             return
 
         if self.caption_image:
-            img_w, img_h = self.caption_image.get_size()
+            caption_image = resolve(self.caption_image)
+            img_w, img_h = caption_image.get_size()
             max_w = self.boundary.width - 100
             max_h = self.boundary.height // 3
             scale = min(max_w / img_w, max_h / img_h, 1)
             new_size = (int(img_w * scale), int(img_h * scale))
-            img = pg.transform.smoothscale(self.caption_image, new_size)
+            img = scaled(caption_image, new_size, smooth=True)
             img_rect = img.get_rect(
                 center=(self.boundary.centerx, self.boundary.centery - 50)
             )
             surface.blit(img, img_rect)
 
-        font = pg.font.SysFont("Arial", 48)
-        question_surf = font.render(self.question, True, (255, 255, 255))
+        question_surf = render_text(self.question, (255, 255, 255), 48)
         question_rect = question_surf.get_rect(
             center=(self.boundary.centerx, self.boundary.top + 50)
         )
@@ -143,6 +219,8 @@ class Quiz(GenericMinigame):
 
 
 class Memory(GenericMinigame):
+    EVENT_TYPES = frozenset({INTERACT_EVENT})
+
     def __init__(self, grid_size=(4, 4), images=None):
         super().__init__(name="MemoryGame")
         self.grid_size = grid_size
@@ -150,7 +228,10 @@ class Memory(GenericMinigame):
         self.cards = []
         self.flipped = []
         self.matched = set()
-        self.card_size = (110, 110)
+        self.card_size = (110, 110)  # made to fit the boundary in setup
+        self.spacing = 20
+        self.grid_origin = (0, 0)  # topleft of the first card
+        self.card_margin = 5  # between the card border and the image
         self.last_flip_time = None
         self.setup()
         from globalSurfaces import (
@@ -163,27 +244,41 @@ class Memory(GenericMinigame):
         self.error_sound = ERROR_MEMORY_SOUND
         self.win_sound = WIN_MEMORY_SOUND
 
+    def assets(self):
+        return [img for img in self.images if isinstance(img, AssetHandle)]
+
     def setup(self):
         if not self.boundary:
             return
 
         num_cards = self.grid_size[0] * self.grid_size[1]
         assert num_cards % 2 == 0, "Grid must have even number of cards"
-        images = self.images * (num_cards // (2 * len(self.images)))
-        images += random.sample(self.images, num_cards // 2 - len(images))
-        images = images * 2
+        source_images = [resolve(img) for img in self.images]
+        # the picture of each pair (index in source_images), pictures come back when there are more pairs than them
+        pictures = list(range(len(source_images))) * (num_cards // (2 * len(source_images)))
+        pictures += self.rng.sample(range(len(source_images)), num_cards // 2 - len(pictures))
 
         # Create pairs of image indices instead of duplicating images
-        image_pairs = list(range(len(images) // 2)) * 2
-        random.shuffle(image_pairs)
+        image_pairs = pictures * 2
+        self.rng.shuffle(image_pairs)
 
         self.cards = []
+        self.matched = set()
+        # biggest square cards that fit, 110 px cards 20 px apart for a 4x4 grid in 550 px
+        cell = min(
+            (self.boundary.width - 30) // self.grid_size[0],
+            (self.boundary.height - 30) // self.grid_size[1],
+        )
+        spacing = max(1, cell * 2 // 13)
+        self.card_size = (cell - spacing, cell - spacing)
+        self.spacing = spacing
         w, h = self.card_size
-        spacing = 20
         total_w = self.grid_size[0] * w + (self.grid_size[0] - 1) * spacing
         total_h = self.grid_size[1] * h + (self.grid_size[1] - 1) * spacing
         start_x = self.boundary.centerx - total_w // 2
         start_y = self.boundary.centery - total_h // 2
+        self.grid_origin = (start_x, start_y)
+        margin = self.card_margin = max(1, w // 22)
 
         for y in range(self.grid_size[1]):
             for x in range(self.grid_size[0]):
@@ -192,22 +287,12 @@ class Memory(GenericMinigame):
                     start_x + x * (w + spacing), start_y + y * (h + spacing), w, h
                 )
 
-                image_idx = image_pairs[idx]
-                original_image = images[image_idx]
-                resized_image = pg.transform.scale(
-                    original_image, (self.card_size[0] - 10, self.card_size[1] - 10)
-                )
+                image_idx = image_pairs[idx]  # the pair id : any two cards with the same picture match
+                original_image = source_images[image_idx]
+                resized_image = scaled(original_image, (w - 2 * margin, h - 2 * margin))
 
                 self.cards.append(
-                    {
-                        "rect": rect,
-                        "image": original_image,
-                        "resized": resized_image,
-                        "flipped": False,
-                        "matched": False,
-                        "index": idx,
-                        "pair_id": image_idx,  # Add pair identifier for matching
-                    }
+                    MemoryCard(rect, original_image, resized_image, image_idx)
                 )
 
         print(f"Memory game setup with {len(self.cards)} cards.")
@@ -221,13 +306,13 @@ class Memory(GenericMinigame):
             self.setup()
 
         if len(self.flipped) == 2 and not self.last_flip_time:
-            self.last_flip_time = time()
+            self.last_flip_time = game_time()
 
-        if self.last_flip_time and time() - self.last_flip_time > 1:
+        if self.last_flip_time and game_time() - self.last_flip_time > 1:
             idx1, idx2 = self.flipped
-            if self.cards[idx1]["pair_id"] == self.cards[idx2]["pair_id"]:
-                self.cards[idx1]["matched"] = True
-                self.cards[idx2]["matched"] = True
+            if self.cards[idx1].pair_id == self.cards[idx2].pair_id:
+                self.cards[idx1].matched = True
+                self.cards[idx2].matched = True
 
                 self.matched.add(idx1)
                 self.matched.add(idx2)
@@ -235,72 +320,114 @@ class Memory(GenericMinigame):
             else:
                 self.error_sound.play()
 
-            self.cards[idx1]["flipped"] = False
-            self.cards[idx2]["flipped"] = False
+            self.cards[idx1].flipped = False
+            self.cards[idx2].flipped = False
             self.flipped = []
             self.last_flip_time = None
+            self.mark_dirty()
 
         if (
-            all(card["matched"] for card in self.cards)
+            len(self.matched) == len(self.cards)  # the matched cards are counted, no need to look at them all
             and not self.completed
             and not self.is_completed_countdown
         ):
             print("Memory game completed!")
-            self.is_completed_countdown = time() + 1
+            self.is_completed_countdown = game_time() + 1
+
+    def wake_time(self):
+        if self.is_completed_countdown:
+            return super().wake_time()
+        if self.last_flip_time:
+            return self.last_flip_time + 1  # the two cards are checked a second later
+        if len(self.flipped) == 2:
+            return 0
+        return None
 
     def draw(self, surface: pg.Surface, screenshot_mode=False):
         super().draw(surface, screenshot_mode)
         if self.completed and not screenshot_mode:
             return
 
-        font = pg.font.SysFont("Arial", 48)
-        title_surf = font.render("Memory Game", True, (255, 255, 255))
+        title_surf = render_text("Memory Game", (255, 255, 255), 48)
         title_rect = title_surf.get_rect(
             center=(self.boundary.centerx, self.boundary.top + 60)
         )
         surface.blit(title_surf, title_rect)
 
+        back = self.card_sprite(None)
         for card in self.cards:
-            color = (
-                (200, 200, 200) if card["flipped"] or card["matched"] else (50, 50, 50)
-            )
-            pg.draw.rect(surface, color, card["rect"])
-            pg.draw.rect(surface, (255, 255, 255), card["rect"], 2)
-            if card["flipped"] or card["matched"]:
-                if isinstance(card["resized"], pg.Surface):
-                    surface.blit(
-                        card["resized"], (card["rect"].x + 5, card["rect"].y + 5)
-                    )
-                else:
-                    img_font = pg.font.SysFont("Arial", 36)
-                    img_surf = img_font.render(str(card["image"]), True, (0, 0, 0))
-                    img_rect = img_surf.get_rect(center=card["rect"].center)
-                    surface.blit(img_surf, img_rect)
+            if card.flipped or card.matched:
+                surface.blit(self.card_sprite(card), card.rect)
+            else:
+                surface.blit(back, card.rect)
+
+    def card_sprite(self, card: MemoryCard | None) -> pg.Surface:
+        """A card with its border and its face (None : the back), the same pairs share it."""
+        size = self.card_size
+        margin = self.card_margin
+
+        def build():
+            sprite = pg.Surface(size)
+            sprite.fill((50, 50, 50) if card is None else (200, 200, 200))
+            pg.draw.rect(sprite, (255, 255, 255), sprite.get_rect(), 2)
+            if card is None:
+                return sprite
+            if isinstance(card.resized, pg.Surface):
+                sprite.blit(card.resized, (margin, margin))
+            else:
+                img_surf = render_text(str(card.image), (0, 0, 0), 36)
+                sprite.blit(img_surf, img_surf.get_rect(center=sprite.get_rect().center))
+            return sprite
+
+        if card is None:
+            return widget_sprite(("memory_card_back", size), build)
+        if isinstance(card.resized, pg.Surface):
+            return widget_sprite(("memory_card", size, margin), build, card.resized)
+        return widget_sprite(("memory_card_text", size, str(card.image)), build)
+
+    def card_at(self, pos) -> int | None:
+        """Index of the card under pos, found from the grid layout (None between the cards)."""
+        if not self.cards:
+            return None
+        cell_w = self.card_size[0] + self.spacing
+        cell_h = self.card_size[1] + self.spacing
+        x, y = pos[0] - self.grid_origin[0], pos[1] - self.grid_origin[1]
+        column, row = x // cell_w, y // cell_h
+        if not (0 <= column < self.grid_size[0] and 0 <= row < self.grid_size[1]):
+            return None
+        if x % cell_w >= self.card_size[0] or y % cell_h >= self.card_size[1]:
+            return None  # in the spacing
+        return row * self.grid_size[0] + column
 
     def handle_event(self, event: pg.event.Event):
-        if event.type == pg.USEREVENT + 0:
-            pos = event.pos
-            for idx, card in enumerate(self.cards):
-                if (
-                    card["rect"].collidepoint(pos)
-                    and not card["flipped"]
-                    and not card["matched"]
-                    and self.last_flip_time is None
-                ):
-                    card["flipped"] = True
-                    self.sound.play()
-
-                    self.flipped.append(idx)
-                    if len(self.flipped) > 2:
-                        # Should not happen, but reset if it does
-                        for i in self.flipped:
-                            self.cards[i]["flipped"] = False
-                        self.flipped = [idx]
-                    break
+        if event.type == INTERACT_EVENT:
+            idx = self.card_at(event.pos)
+            if idx is None:
+                return
+            card = self.cards[idx]
+            if not card.flipped and not card.matched and self.last_flip_time is None:
+                card.flipped = True
+                self.sound.play()
+
+                self.flipped.append(idx)
+                if len(self.flipped) > 2:
+                    # Should not happen, but reset if it does
+                    for i in self.flipped:
+                        self.cards[i].flipped = False
+                    self.flipped = [idx]
 
 
 class SlidingPuzzle(GenericMinigame):
-    def __init__(self, grid_size=(4, 4), image: pg.Surface = None):
+    # H shows the next move of a shortest solution, shift+H lets the puzzle solve itself (with hints=True)
+    EVENT_TYPES = frozenset({INTERACT_EVENT, pg.KEYDOWN})
+    HINT_DURATION = 1.5
+    # a 4x4 solve is spread over the updates : about 2 us per board, so ~1 ms per update (1.2 ms for 99% of them).
+    # A count and not a time limit, so a replay gives the same hints
+    SEARCH_NODES_PER_UPDATE = 400
+
+    def __init__(self, grid_size=(4, 4), image: pg.Surface = None, distance=None, hints=False):
+        """distance : moves of the shortest solution of the shuffled board, None for any.
+        hints : H and shift+H work. Both hints and distance need the solver, see Solver for its cost."""
         super().__init__(name="SlidingPuzzle")
         self.grid_size = grid_size
         self.tiles = []
@@ -310,10 +437,31 @@ class SlidingPuzzle(GenericMinigame):
         self.shuffling = True
         self.setup_done = False
         self.moved_indexes = None
+        self.misplaced = 0  # tiles not at their place, only changed by the moves
+        self.board = None  # every tile drawn at its place, only the cells that change are redrawn
+
+        self.distance = distance
+        self.search = None  # shortest solution being searched, a bit on each update
+        self.solution = None  # moves left (cells to click), next one last
+        self.solution_optimal = False  # False once the player went away from it
+        self.hint_requested = False
+        self.hint_cell = None
+        self.hint_end = 0
+        self.auto_solving = False
+        self.hints = hints
 
-        from globalSurfaces import BUTTON_PUSHED_SOUND
+        from globalSurfaces import BUTTON_PUSHED_SOUND, REGISTRY
 
         self.sound = BUTTON_PUSHED_SOUND
+        self.solver = REGISTRY.lazy(
+            lambda: Solver(*grid_size), f"sliding puzzle solver {grid_size}"
+        )
+
+    def assets(self):
+        images = [self.image] if isinstance(self.image, AssetHandle) else []
+        # only when it is used : the 4x4 tables take 45 s to build the first time
+        needs_solver = self.hints or self.distance is not None
+        return images + [self.solver] if needs_solver else images
 
     def setup(self):
         if not self.boundary:
@@ -324,52 +472,109 @@ class SlidingPuzzle(GenericMinigame):
         )
         self.tile_size = (w, h)
         self.tiles = []
-        self.image = pg.transform.scale(
-            self.image,
-            (
-                self.grid_size[0] * self.tile_size[0],
-                self.grid_size[1] * self.tile_size[1],
-            ),
-        )
-
-        img = self.image
-        if img is None:
-            img = pg.Surface((w * self.grid_size[0], h * self.grid_size[1]))
-            img.fill((150, 100, 200))
+        image_size = (w * self.grid_size[0], h * self.grid_size[1])
+        if self.image is None:
+            self.image = pg.Surface(image_size)
+            self.image.fill((150, 100, 200))
+        else:
+            self.image = scaled(resolve(self.image), image_size)
+
+        # the tiles are areas of the one scaled image, nothing is copied
         for y in range(self.grid_size[1]):
             row = []
             for x in range(self.grid_size[0]):
                 if (x, y) == (self.grid_size[0] - 1, self.grid_size[1] - 1):
                     row.append(None)
                 else:
-                    rect = pg.Rect(x * w, y * h, w, h)
-
-                    tile_img = img.subsurface(rect).copy()
-                    row.append({"img": tile_img, "pos": (x, y), "correct": (x, y)})
+                    area = pg.Rect(x * w, y * h, w, h)
+                    row.append(PuzzleTile(area, (x, y)))
             self.tiles.append(row)
         self.empty_pos = (self.grid_size[0] - 1, self.grid_size[1] - 1)
         self.shuffle()
+        self.misplaced = sum(
+            tile is not None and tile.correct != (x, y)
+            for y, row in enumerate(self.tiles)
+            for x, tile in enumerate(row)
+        )
+
+        self.board = pg.Surface(image_size, pg.SRCALPHA)
+        for y in range(self.grid_size[1]):
+            for x in range(self.grid_size[0]):
+                self.draw_cell(x, y)
         self.setup_done = True
 
+    def draw_cell(self, x: int, y: int, hidden=False):
+        """Redraws a cell of the board, empty if hidden (its tile is sliding)."""
+        w, h = self.tile_size
+        rect = pg.Rect(x * w, y * h, w, h)
+        self.board.fill((0, 0, 0, 0), rect)
+        tile = self.tiles[y][x]
+        if tile is None or hidden:
+            return
+        self.board.blit(self.image, rect, tile.area)
+        pg.draw.rect(self.board, (255, 255, 255), rect, 2)
+
     def shuffle(self):
-        # Perform a number of random valid moves to shuffle the puzzle
-        moves = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-        last_move = None
-        for _ in range(100):
-            x, y = self.empty_pos
-            random.shuffle(moves)
-            for dx, dy in moves:
-                nx, ny = x + dx, y + dy
-                if 0 <= nx < self.grid_size[0] and 0 <= ny < self.grid_size[1]:
-                    if last_move and (nx, ny) == last_move:
-                        continue
-                    self.tiles[y][x], self.tiles[ny][nx] = (
-                        self.tiles[ny][nx],
-                        self.tiles[y][x],
-                    )
-                    self.empty_pos = (nx, ny)
-                    last_move = (x, y)
-                    break
+        # any solvable board with the same chances,
+        # or a random one self.distance moves away from solved
+        width, height = self.grid_size
+        if self.distance is None:
+            board = random_board(width, height, self.rng)
+            self.solution = None
+        else:
+            board, solution = resolve(self.solver).board_at_distance(self.distance, self.rng)
+            self.solution = solution[::-1]
+            self.solution_optimal = True
+        tiles = {tile.correct: tile for row in self.tiles for tile in row if tile}
+        self.tiles = [[None] * width for _ in range(height)]
+        for cell, tile in enumerate(board):
+            x, y = cell % width, cell // width
+            if tile == width * height - 1:
+                self.empty_pos = (x, y)
+            else:
+                self.tiles[y][x] = tiles[(tile % width, tile // width)]
+
+    def board_state(self) -> tuple:
+        """The board as the solver sees it."""
+        width, height = self.grid_size
+        return tuple(
+            (
+                width * height - 1
+                if tile is None
+                else tile.correct[1] * width + tile.correct[0]
+            )
+            for row in self.tiles
+            for tile in row
+        )
+
+    def next_move(self) -> tuple[int, int] | None:
+        """Tile to move next (grid position). Instant : the solution known so far,
+        else the move that looks the best, while the shortest solution is searched
+        over the next updates."""
+        solver = resolve(self.solver)
+        if not self.search and not self.solution_optimal and solver.optimal:
+            self.search = solver.search(self.board_state())
+        if self.search and self.search.step(self.SEARCH_NODES_PER_UPDATE):
+            self.solution = self.search.solution[::-1]
+            self.solution_optimal = True
+            self.search = None
+        if self.solution:
+            cell = self.solution[-1]
+        else:
+            cell = solver.greedy_move(self.board_state())
+        if cell is None:
+            return None
+        return cell % self.grid_size[0], cell // self.grid_size[0]
+
+    def move_tile(self, grid_x: int, grid_y: int):
+        """Slides the tile at (grid_x, grid_y) into the empty cell."""
+        empty_x, empty_y = self.empty_pos
+        self.sound.play()
+        self.moved_indexes = ((grid_y, grid_x), (empty_y, empty_x))
+        self.moved_lerp_increment = 10
+        self.draw_cell(grid_x, grid_y, hidden=True)
+        if self.hint_cell == (grid_x, grid_y):
+            self.hint_cell = None
 
     def update(self):
         super().update()
@@ -378,64 +583,101 @@ class SlidingPuzzle(GenericMinigame):
         if not self.setup_done and self.boundary:
             self.setup()
         # Check for completion
-        solved = True
-        for y in range(self.grid_size[1]):
-            for x in range(self.grid_size[0]):
-                tile = self.tiles[y][x]
-                if tile is None:
-                    continue
-                if tile["correct"] != (x, y):
-                    solved = False
-        if solved and not self.is_completed_countdown:
-            self.is_completed_countdown = time() + 1
+        if not self.misplaced and not self.is_completed_countdown:
+            self.is_completed_countdown = game_time() + 1
+            self.auto_solving = False
+
+        if self.hint_cell and game_time() >= self.hint_end:
+            self.hint_cell = None
+            self.mark_dirty()
+        if self.misplaced and not self.moved_indexes:
+            if self.auto_solving:
+                move = self.next_move()
+                if self.solution:  # don't follow guesses
+                    self.move_tile(*move)
+                elif not self.search:  # too big to be solved
+                    self.auto_solving = False
+            elif self.hint_requested:
+                self.hint_requested = False
+                self.hint_cell = self.next_move()
+                self.hint_end = game_time() + self.HINT_DURATION
+                self.mark_dirty()
+            elif self.search:  # keeps searching in the background once a hint was asked
+                self.next_move()
 
         if self.moved_indexes:
+            self.mark_dirty()  # the tile is sliding
             (y1, x1), (y2, x2) = self.moved_indexes
             if self.moved_lerp_increment > 0:
                 self.moved_lerp_increment -= 1
             else:
+                tile = self.tiles[y1][x1]
+                self.misplaced += (tile.correct != (x2, y2)) - (tile.correct != (x1, y1))
                 self.tiles[y1][x1], self.tiles[y2][x2] = (
                     self.tiles[y2][x2],
                     self.tiles[y1][x1],
                 )
                 self.empty_pos = (x1, y1)
                 self.moved_indexes = None
+                self.draw_cell(x2, y2)
+
+                # keep the solution up to date : one move done,
+                # or one more move to undo what the player did
+                width = self.grid_size[0]
+                if self.solution and self.solution[-1] == y1 * width + x1:
+                    self.solution.pop()
+                elif self.solution is not None:
+                    self.solution.append(y2 * width + x2)
+                    self.solution_optimal = False
+                if self.search:  # it was searching from the previous board
+                    self.search = None
+                    self.solution_optimal = False
+
+    def wake_time(self):
+        if self.is_completed_countdown:
+            return super().wake_time()
+        if self.moved_indexes or self.search or self.hint_requested:
+            return 0  # sliding or solving
+        if self.auto_solving:
+            return 0
+        if self.setup_done and not self.misplaced:
+            return 0  # solved, the countdown starts on the next update
+        if self.hint_cell:
+            return self.hint_end
+        return None
 
     def draw(self, surface: pg.Surface, screenshot_mode=False):
         super().draw(surface, screenshot_mode)
         if self.completed and not screenshot_mode:
             return
 
-        w, h = self.tile_size
-        for y in range(self.grid_size[1]):
-            for x in range(self.grid_size[0]):
-                tile = self.tiles[y][x]
-                if self.moved_indexes:
-                    (my1, mx1), (my2, mx2) = self.moved_indexes
-                    if (y, x) == (my1, mx1):
-                        lerp = (10 - self.moved_lerp_increment) / 10
-                        draw_x = self.boundary.left + (mx1 + (mx2 - mx1) * lerp) * w
-                        draw_y = self.boundary.top + (my1 + (my2 - my1) * lerp) * h
-                        rect = pg.Rect(draw_x, draw_y, w, h)
-                    elif (y, x) == (my2, mx2):  # do nothing for the other tile
-                        continue
-                    else:
-                        rect = pg.Rect(
-                            self.boundary.left + x * w, self.boundary.top + y * h, w, h
-                        )
-                else:
-                    rect = pg.Rect(
-                        self.boundary.left + x * w, self.boundary.top + y * h, w, h
-                    )
-                if tile is None:
-                    continue
-                surface.blit(tile["img"], rect)
-                pg.draw.rect(surface, (255, 255, 255), rect, 2)
+        if not self.board:
+            return
+        surface.blit(self.board, self.boundary.topleft)
+        if self.moved_indexes:  # the sliding tile, its cell is empty on the board
+            w, h = self.tile_size
+            (my1, mx1), (my2, mx2) = self.moved_indexes
+            lerp = (10 - self.moved_lerp_increment) / 10
+            draw_x = self.boundary.left + (mx1 + (mx2 - mx1) * lerp) * w
+            draw_y = self.boundary.top + (my1 + (my2 - my1) * lerp) * h
+            rect = pg.Rect(draw_x, draw_y, w, h)
+            surface.blit(self.image, rect, self.tiles[my1][mx1].area)
+            pg.draw.rect(surface, (255, 255, 255), rect, 2)
+        if self.hint_cell:
+            w, h = self.tile_size
+            x, y = self.hint_cell
+            rect = (self.boundary.left + x * w, self.boundary.top + y * h, w, h)
+            pg.draw.rect(surface, (255, 220, 0), rect, 5)
 
     def handle_event(self, event: pg.event.Event):
         if self.completed:
             return
-        if event.type == pg.USEREVENT + 0 and not self.moved_indexes:
+        if event.type == pg.KEYDOWN and event.key == pg.K_h and self.hints:
+            if event.mod & pg.KMOD_SHIFT:
+                self.auto_solving = not self.auto_solving
+            else:
+                self.hint_requested = True
+        if event.type == INTERACT_EVENT and not self.moved_indexes:
 
             mx, my = event.pos
             width, height = self.tile_size
@@ -446,13 +688,12 @@ class SlidingPuzzle(GenericMinigame):
                 if (abs(grid_x - empty_x) == 1 and grid_y == empty_y) or (
                     abs(grid_y - empty_y) == 1 and grid_x == empty_x
                 ):  # Check if adjacent
-                    # Swap tile with empty
-                    self.sound.play()
-                    self.moved_indexes = ((grid_y, grid_x), (empty_y, empty_x))
-                    self.moved_lerp_increment = 10
+                    self.move_tile(grid_x, grid_y)
 
 
 class ColorButton:
+    FLASH_DURATION = 0.4
+
     def __init__(self, center, radius, color, flash_color, index):
         self.center = center
         self.radius = radius
@@ -461,32 +702,39 @@ class ColorButton:
         self.index = index
         self.flashing = False
         self.flash_end_time = 0
-        from globalSurfaces import (
-            GREEN_BUTTON_SOUND,
-            RED_BUTTON_SOUND,
-            YELLOW_BUTTON_SOUND,
-            BLUE_BUTTON_SOUND,
-        )
+        self.sound_at_flash = ColorButton.tone(index)
+
+    @staticmethod
+    def tone(index: int):
+        """The note of the index-th button, synthesized once (see audio.note)."""
+        from globalSurfaces import REGISTRY
 
-        COLOR_MAP = {  # je sais c'est moche mais du coup ça rend le code moins moche
-            (100, 20, 20): RED_BUTTON_SOUND,
-            (220, 40, 40): RED_BUTTON_SOUND,
-            (20, 100, 20): GREEN_BUTTON_SOUND,
-            (40, 220, 40): GREEN_BUTTON_SOUND,
-            (20, 20, 100): BLUE_BUTTON_SOUND,
-            (40, 40, 220): BLUE_BUTTON_SOUND,
-            (100, 100, 20): YELLOW_BUTTON_SOUND,
-            (220, 220, 40): YELLOW_BUTTON_SOUND,
-        }
-        self.sound_at_flash = COLOR_MAP[self.color]
+        return REGISTRY.tone(note(index), ColorButton.FLASH_DURATION)
 
     def draw(self, surface):
         draw_color = self.flash_color if self.flashing else self.color
-        pg.draw.circle(surface, draw_color, self.center, self.radius)
-        pg.draw.circle(surface, (255, 255, 255), self.center, self.radius, 4)
+        sprite = ColorButton.sprite(draw_color, self.radius)
+        topleft = (self.center[0] - self.radius - 1, self.center[1] - self.radius - 1)
+        surface.blit(sprite, topleft)
+
+    @staticmethod
+    def sprite(color, radius) -> pg.Surface:
+        """The button drawn once, with a pixel to spare around the circle.
+        Colorkey and not per pixel alpha : the circles have no soft edges, and RLE blits are faster."""
+
+        def build():
+            sprite = pg.Surface((2 * radius + 2, 2 * radius + 2))
+            sprite.fill((255, 0, 255))
+            sprite.set_colorkey((255, 0, 255), pg.RLEACCEL)
+            center = (radius + 1, radius + 1)
+            pg.draw.circle(sprite, color, center, radius)
+            pg.draw.circle(sprite, (255, 255, 255), center, radius, 4)
+            return sprite
+
+        return widget_sprite(("color_button", color, radius), build)
 
     def handle_event(self, event):
-        if event.type == pg.USEREVENT + 0 and not self.flashing:
+        if event.type == INTERACT_EVENT and not self.flashing:
             if (
                 pg.Vector2(event.pos) - pg.Vector2(self.center)
             ).length() <= self.radius:
@@ -495,18 +743,20 @@ class ColorButton:
 
         return False
 
-    def flash(self, duration=0.4):
+    def flash(self, duration=FLASH_DURATION):
         self.sound_at_flash.play()
 
         self.flashing = True
-        self.flash_end_time = time() + duration
+        self.flash_end_time = game_time() + duration
 
     def update(self):
-        if self.flashing and time() >= self.flash_end_time:
+        if self.flashing and game_time() >= self.flash_end_time:
             self.flashing = False
 
 
 class ColorSequenceMemory(GenericMinigame):
+    EVENT_TYPES = frozenset({INTERACT_EVENT, RESET_EVENT})
+
     COLORS = [
         ((100, 20, 20), (220, 40, 40)),  # Red
         ((20, 100, 20), (40, 220, 40)),  # Green
@@ -514,10 +764,19 @@ class ColorSequenceMemory(GenericMinigame):
         ((100, 100, 20), (220, 220, 40)),  # Yellow
     ]
 
-    def __init__(self, sequence_length):
+    def __init__(self, sequence_length, colors=4):
+        """colors : number of buttons, the ones after the four of COLORS get their own hue and note."""
         super().__init__(name="ColorSequenceMemory")
         self.sequence_length = sequence_length
-        self.sequence = [random.randint(0, 3) for _ in range(self.sequence_length)]
+        self.colors = self.COLORS[:colors]
+        for i in range(len(self.colors), colors):
+            # orange, cyan, purple... : golden angle steps, the hues stay far apart
+            hue = (30 + (i - len(self.COLORS)) * 137.5) % 360
+            color, flash_color = pg.Color(0), pg.Color(0)
+            color.hsva = (hue, 80, 40, 100)
+            flash_color.hsva = (hue, 80, 86, 100)
+            self.colors.append((tuple(color)[:3], tuple(flash_color)[:3]))
+        self.sequence = []  # drawn in setup, once self.rng is the level's one
         self.user_input = []
         self.buttons = []
         self.state = "waiting"  # waiting, showing, input, finished : FSM
@@ -527,28 +786,45 @@ class ColorSequenceMemory(GenericMinigame):
         self.message = "Memorise la séquence !"
         self.last_flash_time = 0
 
+    def assets(self):
+        # synthesized by the preloader, not on the first flash
+        return [ColorButton.tone(i) for i in range(len(self.colors))]
+
     def setup(self):
         if not self.boundary:
             return
 
         cx, cy = self.boundary.centerx, self.boundary.centery
         r = min(self.boundary.width, self.boundary.height) // 6
-        offset = r * 2
-        positions = [
-            (cx - offset, cy - offset),
-            (cx + offset, cy - offset),
-            (cx - offset, cy + offset),
-            (cx + offset, cy + offset),
+        if len(self.colors) == 4:
+            offset = r * 2
+            positions = [
+                (cx - offset, cy - offset),
+                (cx + offset, cy - offset),
+                (cx - offset, cy + offset),
+                (cx + offset, cy + offset),
+            ]
+        else:  # on a circle open at the bottom (the start button), as big as they fit
+            ring = r * 2
+            step = math.radians(270) / max(1, len(self.colors) - 1)
+            r = min(int(r * 0.8), int(ring * math.sin(step / 2) * 0.9))
+            angles = [math.radians(-135) + i * step for i in range(len(self.colors))]
+            positions = [
+                (round(cx + ring * math.sin(a)), round(cy - ring * math.cos(a)))
+                for a in angles
+            ]
+        self.sequence = [
+            self.rng.randint(0, len(self.colors) - 1) for _ in range(self.sequence_length)
         ]
         self.buttons = []
-        for i, ((color, flash_color), pos) in enumerate(zip(self.COLORS, positions)):
+        for i, ((color, flash_color), pos) in enumerate(zip(self.colors, positions)):
             self.buttons.append(ColorButton(pos, r, color, flash_color, i))
 
         from Button import Button
         from globalSurfaces import BUTTON_UP
 
-        button_width = BUTTON_UP.get_width()
-        button_height = BUTTON_UP.get_height()
+        button_width = BUTTON_UP.get().get_width()
+        button_height = BUTTON_UP.get().get_height()
         rect = pg.Rect(
             cx - button_width // 2,
             self.boundary.bottom - 120,
@@ -564,7 +840,7 @@ class ColorSequenceMemory(GenericMinigame):
         self.user_input = []
         self.state = "showing"
         self.show_index = 0
-        self.show_next_time = time() + 0.5
+        self.show_next_time = game_time() + 0.5
 
     def update(self):
         super().update()
@@ -572,10 +848,12 @@ class ColorSequenceMemory(GenericMinigame):
             return
         if not self.buttons and self.boundary:
             self.setup()
+        if self.state == "showing" or any(btn.flashing for btn in self.buttons):
+            self.mark_dirty()  # checked before the buttons update, so the end of a flash is redrawn too
         for btn in self.buttons:
             btn.update()
         if self.state == "showing":
-            now = time()
+            now = game_time()
             if self.show_index < len(self.sequence):
                 if now >= self.show_next_time:
                     idx = self.sequence[self.show_index]
@@ -590,7 +868,21 @@ class ColorSequenceMemory(GenericMinigame):
 
         elif self.state == "finished":
             if not self.is_completed_countdown:
-                self.is_completed_countdown = time() + 1
+                self.is_completed_countdown = game_time() + 1
+
+    def wake_time(self):
+        if self.is_completed_countdown:
+            return super().wake_time()
+        if self.state == "finished":
+            return 0  # the countdown starts on the next update
+        # the end of the flashes, and the next flash of the sequence
+        times = [btn.flash_end_time for btn in self.buttons if btn.flashing]
+        if self.state == "showing":
+            if self.show_index < len(self.sequence):
+                times.append(self.show_next_time)
+            elif not times:
+                return 0  # over, the input starts on the next update
+        return min(times, default=None)
 
     def draw(self, surface: pg.Surface, screenshot_mode=False):
         super().draw(surface, screenshot_mode)
@@ -604,8 +896,7 @@ class ColorSequenceMemory(GenericMinigame):
             self.start_button.draw(surface)
         # Draw message
         if self.message:
-            msg_font = pg.font.SysFont("Arial", 32)
-            msg_surf = msg_font.render(self.message, True, (255, 255, 255))
+            msg_surf = render_text(self.message, (255, 255, 255), 32)
             msg_rect = msg_surf.get_rect(
                 center=(self.boundary.centerx, self.boundary.centery)
             )
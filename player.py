@@ -4,20 +4,40 @@ from globalSurfaces import PLAYER_ANIMATION
 
 class Player:
     def __init__(self, x, y):
-        self.anim = PLAYER_ANIMATION
+        self.anim = PLAYER_ANIMATION.get()
         self.surf = self.anim.get_frame()
         self.anim.reset_frame()
-        self.idle_surf = self.surf.copy()
         self.rect = pg.Rect(x, y, self.surf.get_width(), self.surf.get_height())
         self.moving = False
         self.facing_left = False
+        self.drawn_rect = None  # where and what was last drawn, for the dirty rect renderer
+        self.drawn_surf = None
+        self.previous_pos = self.rect.topleft  # position before the last update
+        self.interpolation = 1.0  # set by the game before drawing, see GameClock.alpha
+
+    def draw_rect(self) -> pg.Rect:
+        """Where the player is drawn : between its last two positions, so it moves smoothly whatever the frame rate."""
+        return self.rect.move(
+            round((self.previous_pos[0] - self.rect.x) * (1 - self.interpolation)),
+            round((self.previous_pos[1] - self.rect.y) * (1 - self.interpolation)),
+        )
 
     def draw(self, surface: pg.Surface):
-        surface.blit(self.surf, self.rect)
+        self.drawn_rect = self.draw_rect()
+        self.drawn_surf = self.surf
+        surface.blit(self.surf, self.drawn_rect)
+
+    def dirty_rects(self, force=False) -> list[pg.Rect]:
+        """Areas to redraw since the last draw, force when what's behind the player changes."""
+        rect = self.draw_rect()
+        if not force and self.drawn_rect == rect and self.drawn_surf is self.surf:
+            return []
+        return [r for r in (self.drawn_rect, rect) if r]
 
-    def handle_movement_inputs(self):
+    def handle_movement_inputs(self, keys):
+        """keys : the pressed keys, like pg.key.get_pressed()."""
+        self.previous_pos = self.rect.topleft
         self.moving = False
-        keys = pg.key.get_pressed()
         if keys[pg.K_LEFT]:
             self.rect.x -= 5
             self.moving = True
@@ -45,12 +65,9 @@ class Player:
                 )
 
     def update(self):
+        # Flip sprite based on direction (the mirrored frames are made once by the spritesheet)
+        flip = not self.facing_left
         if self.moving:
-            self.surf = self.anim.get_frame()
+            self.surf = self.anim.get_frame(flip_x=flip)
         else:
-            self.anim.reset_frame()
-            self.surf = self.idle_surf.copy()  # Use copy to avoid modifying original
-
-        # Flip sprite based on direction
-        if not self.facing_left:
-            self.surf = pg.transform.flip(self.surf, True, False)
+            self.surf = self.anim.reset_frame(flip_x=flip)  # idle is the first frame
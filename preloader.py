@@ -0,0 +1,89 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+import threading
+
+# loads the next level on worker threads while the current one is being played
+
+
+class PreloadJob:
+    def __init__(self, executor: ThreadPoolExecutor, build_level, prepare):
+        """build_level() gives a LevelConfig, its assets are then loaded in parallel and prepare(config) is called.
+        Everything runs on the executor threads, use result() to get what prepare returned."""
+        self._executor = executor
+        self._build_level = build_level
+        self._prepare = prepare
+        self._cancel_event = threading.Event()
+        self._lock = threading.Lock()
+        self._asset_futures = []
+        self.steps_done = 0
+        self.steps_total = 2  # building the level + preparing it, the assets are added once they are known
+        self._future = executor.submit(self._run)
+
+    @property
+    def progress(self) -> float:
+        """Between 0 and 1."""
+        with self._lock:
+            return self.steps_done / self.steps_total
+
+    @property
+    def done(self) -> bool:
+        return self._future.done()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        """Stops the job as soon as possible, loads that already started still finish."""
+        self._cancel_event.set()
+        self._future.cancel()
+        for future in self._asset_futures:
+            future.cancel()
+
+    def result(self, timeout=None):
+        """Waits for the job and returns what prepare returned, or None if it got cancelled."""
+        if self._future.cancelled():
+            return None
+        return self._future.result(timeout)
+
+    def _step_done(self):
+        with self._lock:
+            self.steps_done += 1
+
+    def _run(self):
+        if self.cancelled:
+            return None
+        level = self._build_level()
+        self._step_done()
+
+        assets = level.assets()
+        with self._lock:
+            self.steps_total += len(assets)
+        self._asset_futures = [self._executor.submit(self._load, asset) for asset in assets]
+        wait(self._asset_futures)
+        if self.cancelled:
+            return None
+        for future in self._asset_futures:
+            future.result()  # re-raise loading errors in the caller of result()
+
+        prepared = self._prepare(level)
+        self._step_done()
+        return prepared
+
+    def _load(self, asset):
+        if self.cancelled:
+            return
+        asset.get()
+        self._step_done()
+
+
+class LevelPreloader:
+    def __init__(self, workers: int = 3):
+        # a job waits on its own asset loads, so it needs at least one other worker
+        assert workers >= 2, "The preloader needs at least 2 workers"
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix="preload")
+
+    def preload(self, build_level, prepare) -> PreloadJob:
+        return PreloadJob(self.executor, build_level, prepare)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
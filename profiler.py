@@ -0,0 +1,168 @@
+from bisect import bisect_right
+from collections import deque
+from contextlib import nullcontext
+from time import perf_counter
+import csv
+import json
+import pygame as pg
+
+from fonts import get_font
+
+# timers around the parts of a frame :
+#     with PROFILER.section("starfield.draw"):
+#         ...
+# off by default (a section is then a shared empty context manager), main.py --profile or F3 turn it on
+
+
+class _Section:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = perf_counter()
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.name, (perf_counter() - self.start) * 1000)
+
+
+_OFF = nullcontext()
+
+
+class Profiler:
+    # upper bounds (ms) of the histogram buckets, the last bucket is everything above
+    HISTOGRAM_EDGES = (0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 16.7, 33.3, 66.7)
+    HUD_REFRESH = 30  # frames between two redraws of the overlay text
+    HUD_LINES = 16
+
+    def __init__(self, window: int = 600):
+        """window : number of samples per section the percentiles are computed on (10 s of frames at 60 fps)."""
+        self.enabled = False
+        self.window = window
+        self.samples: dict[str, deque] = {}  # last samples, for the rolling percentiles
+        self.histograms: dict[str, list[int]] = {}  # every sample since the start
+        self.totals: dict[str, float] = {}
+        self.maximums: dict[str, float] = {}
+        self._sections: dict[str, _Section] = {}
+
+        self.hud_visible = False
+        self.hud_surf = None
+        self.hud_age = 0
+        self.hud_drawn_rect = None
+
+    def section(self, name: str):
+        """Context manager timing its block under name. Not reentrant : don't nest a section in itself."""
+        if not self.enabled:
+            return _OFF
+        section = self._sections.get(name)
+        if section is None:
+            section = self._sections[name] = _Section(self, name)
+        return section
+
+    def add(self, name: str, ms: float):
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples[name] = deque(maxlen=self.window)
+            self.histograms[name] = [0] * (len(self.HISTOGRAM_EDGES) + 1)
+            self.totals[name] = 0.0
+            self.maximums[name] = 0.0
+        samples.append(ms)
+        self.histograms[name][bisect_right(self.HISTOGRAM_EDGES, ms)] += 1
+        self.totals[name] += ms
+        if ms > self.maximums[name]:
+            self.maximums[name] = ms
+
+    def percentiles(self, name: str, quantiles=(0.5, 0.95, 0.99)) -> list[float]:
+        """Percentiles (ms) of the last window samples of a section."""
+        values = sorted(self.samples[name])
+        return [values[min(len(values) - 1, int(q * len(values)))] for q in quantiles]
+
+    def summary(self) -> dict[str, dict]:
+        summary = {}
+        for name in self.samples:
+            count = sum(self.histograms[name])
+            p50, p95, p99 = self.percentiles(name)
+            summary[name] = {
+                "count": count,
+                "mean_ms": round(self.totals[name] / count, 4),
+                "p50_ms": round(p50, 4),
+                "p95_ms": round(p95, 4),
+                "p99_ms": round(p99, 4),
+                "max_ms": round(self.maximums[name], 4),
+                "histogram": dict(zip(self._bucket_names(), self.histograms[name])),
+            }
+        return summary
+
+    def _bucket_names(self) -> list[str]:
+        return [f"<={edge}ms" for edge in self.HISTOGRAM_EDGES] + [f">{self.HISTOGRAM_EDGES[-1]}ms"]
+
+    def dump(self, path: str):
+        """Writes the summary of every section, as JSON if path ends with .json, as CSV otherwise."""
+        summary = self.summary()
+        if path.lower().endswith(".json"):
+            with open(path, "w") as file:
+                json.dump(summary, file, indent=2)
+            return
+
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(
+                ["section", "count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"] + self._bucket_names()
+            )
+            for name, stats in summary.items():
+                row = [name] + [stats[key] for key in ("count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms")]
+                writer.writerow(row + list(stats["histogram"].values()))
+
+    def toggle_hud(self):
+        """Shows or hides the overlay, profiling starts with the first show."""
+        self.hud_visible = not self.hud_visible
+        self.enabled = self.enabled or self.hud_visible
+        self.hud_surf = None
+
+    def refresh_hud(self, fps: float):
+        """Called once per frame, the overlay text is only made again every HUD_REFRESH frames."""
+        if not self.hud_visible:
+            return
+        self.hud_age += 1
+        if self.hud_surf is None or self.hud_age >= self.HUD_REFRESH:
+            self.hud_surf = self._render_hud(fps)
+            self.hud_age = 0
+
+    def hud_rects(self) -> list[pg.Rect]:
+        """Where the overlay was and will be drawn since the last call, for the dirty rect renderer."""
+        rects = [self.hud_drawn_rect] if self.hud_drawn_rect else []
+        self.hud_drawn_rect = None
+        if self.hud_surf is not None:
+            self.hud_drawn_rect = self.hud_surf.get_rect(topleft=(10, 10))
+            rects.append(self.hud_drawn_rect)
+        return rects
+
+    def draw_hud(self, surface: pg.Surface):
+        """The slowest sections (by p95)."""
+        if self.hud_surf is not None:
+            surface.blit(self.hud_surf, (10, 10))
+
+    def _render_hud(self, fps: float) -> pg.Surface:
+        stats = sorted(
+            ((self.percentiles(name), name) for name in self.samples), key=lambda stat: stat[0][1], reverse=True
+        )
+        lines = [f"FPS {fps:5.1f}        p50    p95    p99 (ms)"]
+        lines += [
+            f"{name[:22]:<22} {p50:6.2f} {p95:6.2f} {p99:6.2f}" for (p50, p95, p99), name in stats[: self.HUD_LINES]
+        ]
+        font = get_font("Courier New", 18)  # not render_text, these lines would only push useful texts out of its cache
+        texts = [font.render(line, True, (255, 0, 255)) for line in lines]
+
+        hud = pg.Surface((max(text.get_width() for text in texts) + 10, sum(text.get_height() for text in texts) + 10))
+        hud.set_alpha(200)
+        y = 5
+        for text in texts:
+            hud.blit(text, (5, y))
+            y += text.get_height()
+        return hud
+
+
+PROFILER = Profiler()
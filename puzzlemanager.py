@@ -1,5 +1,9 @@
 import pygame as pg
 from puzzlepiece import PuzzlePiece
+from profiler import PROFILER
+from minigame import POSITIONAL_EVENTS
+from scheduler import Scheduler
+from gameclock import game_time
 
 
 class PuzzleManager:
@@ -16,31 +20,83 @@ class PuzzleManager:
                 self.minigames_puzzlepiece_epic_duo.append((piece, minigames[i]))
             else:
                 self.minigames_puzzlepiece_epic_duo.append((piece, None))
+        # for the event routing
+        self.boundaries = [minigame.boundary if minigame else pg.Rect(0, 0, 0, 0) for _, minigame in self.minigames_puzzlepiece_epic_duo]
+        self.listeners: dict[int, list[int]] = {}  # event type -> indexes of the minigames handling it
+        for i, (_, minigame) in enumerate(self.minigames_puzzlepiece_epic_duo):
+            for event_type in minigame.EVENT_TYPES if minigame else ():
+                self.listeners.setdefault(event_type, []).append(i)
+        # idle minigames aren't updated until an event or their wake_time, they all start awake for their setup
+        self.scheduler = Scheduler()
+        for i, (_, minigame) in enumerate(self.minigames_puzzlepiece_epic_duo):
+            if minigame:
+                self.scheduler.wake(i)
+        # profiler section names, made once
+        self.update_sections = [f"{i} {minigame.name}.update" if minigame else None for i, (_, minigame) in enumerate(self.minigames_puzzlepiece_epic_duo)]
+        self.draw_sections = [f"{i} {minigame.name}.draw" if minigame else None for i, (_, minigame) in enumerate(self.minigames_puzzlepiece_epic_duo)]
 
     def update(self):
-        """Update the active minigame."""
-        for piece, minigame in self.minigames_puzzlepiece_epic_duo:
+        """Update the minigames that are awake."""
+        now = game_time()
+        scheduler = self.scheduler
+        scheduler.wake_due(now)
+        for i, (piece, minigame) in enumerate(self.minigames_puzzlepiece_epic_duo):
+            piece.update()
             if minigame and minigame.completed and not piece.playing_fade_animation and not piece.collected:
                 piece.collect()
-            elif minigame:
-                minigame.update()
+            elif minigame and i in scheduler.awake:
+                with PROFILER.section(self.update_sections[i]):
+                    minigame.update()
+                wake_time = minigame.wake_time()
+                if wake_time is None or wake_time > now:
+                    scheduler.sleep(i, wake_time)
+
+    def event_types(self) -> set[int]:
+        """Every event type one of the minigames reacts to."""
+        return set(self.listeners)
 
     def handle_event(self, event):
-        """Handle events for the puzzle manager and active minigame."""
-        for piece, minigame in self.minigames_puzzlepiece_epic_duo:
-            if minigame and not piece.collected and not piece.playing_fade_animation and not minigame.completed:
+        """Sends the event to the minigames that handle its type, positional ones only to the minigame under their pos."""
+        listeners = self.listeners.get(event.type)
+        if not listeners:
+            return
+        if event.type in POSITIONAL_EVENTS:
+            i = pg.Rect(event.pos, (1, 1)).collidelist(self.boundaries)
+            listeners = [i] if i in listeners else []
+        for i in listeners:
+            piece, minigame = self.minigames_puzzlepiece_epic_duo[i]
+            if not piece.collected and not piece.playing_fade_animation and not minigame.completed:
                 minigame.handle_event(event)
+                minigame.dirty = True
+                self.scheduler.wake(i)
+
+    def dirty_rects(self) -> list[pg.Rect]:
+        """Areas of the pieces and minigames that changed since the last call."""
+        rects = []
+        for piece, minigame in self.minigames_puzzlepiece_epic_duo:
+            if piece.dirty:
+                rects.append(piece.rect)
+                piece.dirty = piece.playing_fade_animation  # one last redraw once the piece is gone
+            if minigame and minigame.dirty and minigame.boundary:
+                rects.append(minigame.boundary)
+                minigame.dirty = False
+        return rects
         
-    def draw(self, surface : pg.Surface):
+    def draw(self, surface : pg.Surface, idle_pieces=True):
+        """idle_pieces=False when the idle pieces are baked in a static layer."""
         # Draw puzzle pieces
         for piece, _ in self.minigames_puzzlepiece_epic_duo:
-            piece.draw(surface)
+            piece.draw(surface, idle_pieces)
         
-        for _, minigame in self.minigames_puzzlepiece_epic_duo: # Iterate twice to draw pieces below minigame
+        for i, (_, minigame) in enumerate(self.minigames_puzzlepiece_epic_duo): # Iterate twice to draw pieces below minigame
             if minigame:
-                minigame.draw(surface)
+                with PROFILER.section(self.draw_sections[i]):
+                    minigame.draw(surface)
 
     
+    def idle_pieces(self) -> list[PuzzlePiece]:
+        return [piece for piece, _ in self.minigames_puzzlepiece_epic_duo if piece.is_idle()]
+
     def is_all_pieces_collected(self) -> bool:
         """Check if all puzzle pieces have been collected."""
         return all(piece.collected for piece, _ in self.minigames_puzzlepiece_epic_duo)
\ No newline at end of file
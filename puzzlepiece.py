@@ -1,40 +1,80 @@
 import pygame as pg
+from sprite import SurfaceLRU, scaled
 from globalSurfaces import PUZZLE_PIECE, ACHIEVE_PUZZLE_SOUND
 
+FADE_STEP = 5  # pixels and alpha lost by a collected piece on each update
+
+
+class PieceVariantCache(SurfaceLRU):
+    def __init__(self, budget_bytes: int = 8 * 1024 * 1024):
+        """Tinted and rotated puzzle pieces. The levels all use the same pieces, so each one is only made once per game
+        (about 1.4MB each). The sizes of the collect animation are not kept, each one is only drawn once."""
+        super().__init__(budget_bytes)
+
+    def image(self, color, rotation: int) -> pg.Surface:
+        """The piece tinted with color and rotated. Shared : don't draw on it."""
+        key = (tuple(color), rotation)
+        surf = self.lookup(key)
+        if surf is None:
+            surf = PUZZLE_PIECE.get().copy()
+            surf.fill(
+                (*color, 255), special_flags=pg.BLEND_RGBA_MIN
+            )  # tint the black puzzle piece with the given color (keeping alpha)
+            surf = pg.transform.rotate(surf, rotation)
+            self.store(key, surf)
+        return surf
+
+
+PIECE_VARIANTS = PieceVariantCache()
+
 
 class PuzzlePiece:
     def __init__(self, x, y, color, rotation=0):
-        self.image: pg.Surface = PUZZLE_PIECE.copy()
-        self.image.fill(
-            color + [255], special_flags=pg.BLEND_RGBA_MIN
-        )  # tint the black puzzle piece with the given color (keeping alpha)
-        self.image = pg.transform.rotate(self.image, rotation)
+        self.image: pg.Surface = PIECE_VARIANTS.image(color, rotation)
         self.rect: pg.Rect = self.image.get_rect(topleft=(x, y))
         self.collected: bool = False
         self.playing_fade_animation: bool = False
+        self.dirty: bool = False  # needs to be redrawn, for the dirty rect renderer
+        self.on_collect = None  # called when the piece starts its collect animation
+
+    def is_idle(self) -> bool:
+        """Not collected yet and not animated : the piece looks the same every frame."""
+        return not self.collected and not self.playing_fade_animation
 
-    def draw(self, surface: pg.Surface):
-        if not self.collected and not self.playing_fade_animation:
+    def update(self):
+        """Advances the collect animation (not done in draw, so drawing twice in a frame doesn't make it faster)."""
+        if not self.playing_fade_animation:
+            return
+
+        self.fade_alpha -= FADE_STEP
+        self.fade_size = (self.fade_size[0] - FADE_STEP, self.fade_size[1] - FADE_STEP)
+
+        if self.fade_alpha <= 0:
+
+            self.fade_alpha = 0
+            self.playing_fade_animation = False
+            self.collected = True
+
+    def draw(self, surface: pg.Surface, draw_idle=True):
+        """draw_idle=False when the idle piece is already drawn by a static layer."""
+        if self.is_idle() and draw_idle:
             surface.blit(self.image, self.rect)
 
         if self.playing_fade_animation:
-
-            self.fade_alpha -= 5
-            self.fade_size = (self.fade_size[0] - 5, self.fade_size[1] - 5)
-            fade_image = pg.transform.scale(self.image, self.fade_size)
+            # each size is only drawn once, no point keeping it in the cache
+            fade_image = scaled(self.image, self.fade_size, keep=False)
+            # the first frame is the shared full size image, its alpha is put back once drawn
             fade_image.set_alpha(self.fade_alpha)
             fade_rect = fade_image.get_rect(center=self.rect.center)
             surface.blit(fade_image, fade_rect)
-
-            if self.fade_alpha <= 0:
-
-                self.fade_alpha = 0
-                self.playing_fade_animation = False
-                self.collected = True
+            fade_image.set_alpha(255)
 
     def collect(self):
 
         self.playing_fade_animation = True
+        self.dirty = True
         self.fade_alpha = 255
         self.fade_size = self.image.get_size()
         ACHIEVE_PUZZLE_SOUND.play()
+        if self.on_collect:
+            self.on_collect()
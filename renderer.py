@@ -0,0 +1,83 @@
+import pygame as pg
+
+# opt-in replacement for "redraw everything + pg.display.flip()" every frame
+
+
+class DirtyRectRenderer:
+    def __init__(self, draw_scene, starfield):
+        """draw_scene(surface) draws the whole scene, it is called with the surface clipped to the area that changed.
+        The starfield is handled on its own, only the pixels of the stars that moved are touched."""
+        self.draw_scene = draw_scene
+        self.starfield = starfield
+        self.full_redraw = True
+
+    def invalidate(self):
+        """The next frame redraws and pushes the whole screen (new level, fades...)."""
+        self.full_redraw = True
+
+    def render(self, surface: pg.Surface, dirty_rects: list[pg.Rect], covered: list[pg.Rect]):
+        """dirty_rects are the areas the game objects changed since the last frame.
+        covered are the areas where the stars are never drawn (the scene must not draw them there either)."""
+        if self.full_redraw:
+            surface.set_clip(None)
+            self.draw_scene(surface)
+            pg.display.flip()
+            self.full_redraw = False
+            return
+
+        regions = merge_rects(dirty_rects)
+        # the stars inside the regions are drawn with the rest of the scene
+        updated = self.starfield.draw_dirty(surface, covered + regions)
+        for region in regions:
+            surface.set_clip(region)
+            self.draw_scene(surface)
+        surface.set_clip(None)
+
+        updated += regions
+        if updated:
+            pg.display.update(updated)
+
+
+class StaticLayer:
+    def __init__(self, rect: pg.Rect, bake):
+        """Things that almost never change (the level background, the idle puzzle pieces) baked in one surface.
+        bake(surface, offset) draws them on a transparent surface of the size of rect, offset is minus rect's topleft.
+        The layer is only baked again after invalidate()."""
+        self.rect = pg.Rect(rect)
+        self.bake = bake
+        self.surf = None
+
+    def invalidate(self):
+        self.surf = None
+
+    def _bake(self) -> pg.Surface:
+        # premultiplied alpha, so what's drawn through the transparent parts looks exactly like separate blits
+        layer = pg.Surface(self.rect.size, pg.SRCALPHA)
+        self.bake(layer, (-self.rect.x, -self.rect.y))
+        return layer.convert_alpha()
+
+    def draw(self, surface: pg.Surface):
+        if self.surf is None:
+            self.surf = self._bake()
+        surface.blit(self.surf, self.rect, special_flags=pg.BLEND_PREMULTIPLIED)
+
+
+def blit_premultiplied(layer: pg.Surface, source: pg.Surface, dest):
+    """Draws source over a premultiplied layer (see StaticLayer)."""
+    if source.get_pitch() != source.get_width() * source.get_bytesize():
+        source = source.convert_alpha()  # premul_alpha mixes up the rows of padded surfaces (rendered text)
+    layer.blit(source.premul_alpha(), dest, special_flags=pg.BLEND_PREMULTIPLIED)
+
+
+def merge_rects(rects: list[pg.Rect]) -> list[pg.Rect]:
+    """Merges the overlapping rects together, so no area gets drawn twice."""
+    merged = [pg.Rect(rect) for rect in rects]
+    i = 0
+    while i < len(merged):
+        hit = merged[i].collidelist(merged[i + 1 :])
+        if hit == -1:
+            i += 1
+            continue
+        merged[i].union_ip(merged.pop(i + 1 + hit))  # it grew, so check it again against everyone
+        i = 0
+    return merged
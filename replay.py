@@ -0,0 +1,103 @@
+import marshal
+import struct
+import pygame as pg
+
+# the game reads its input through one of these, so a session can be recorded and played again exactly :
+# the logic runs at a fixed rate (see gameclock.py) and the random module is seeded from the log,
+# so the same inputs on the same updates give the same game
+
+# a log is a header (magic, version, seed) then one record per update :
+# the pressed keys as a bitmask of TRACKED_KEYS, the number of events, and each event (type, size, marshal'd dict)
+_HEADER = struct.Struct("<4sHQ")
+_STEP = struct.Struct("<HH")
+_EVENT = struct.Struct("<IH")
+MAGIC = b"RPLY"
+VERSION = 1
+
+TRACKED_KEYS = (pg.K_LEFT, pg.K_RIGHT, pg.K_UP, pg.K_DOWN, pg.K_LCTRL, pg.K_LSHIFT, pg.K_SPACE, pg.K_c)
+# the events posted by the game itself (>= USEREVENT) aren't recorded, they are posted again while replaying
+RECORDED_EVENTS = (pg.QUIT, pg.KEYDOWN, pg.KEYUP)
+
+
+class KeyState:
+    """Looks like what pg.key.get_pressed() returns, for the tracked keys."""
+
+    def __init__(self, mask: int):
+        self.mask = mask
+
+    def __getitem__(self, key: int) -> bool:
+        return key in TRACKED_KEYS and bool(self.mask >> TRACKED_KEYS.index(key) & 1)
+
+
+def key_mask(keys) -> int:
+    return sum(1 << i for i, key in enumerate(TRACKED_KEYS) if keys[key])
+
+
+def _event_dict(event: pg.event.Event) -> dict:
+    # only what marshal can write (events can hold a Window object for example)
+    return {k: v for k, v in event.dict.items() if isinstance(v, (int, float, str, bool, tuple))}
+
+
+class LiveInput:
+    """The keyboard and the event queue."""
+
+    def read(self) -> tuple:
+        """Called once per update : the pressed keys (like pg.key.get_pressed()) and the new events."""
+        return pg.key.get_pressed(), pg.event.get()
+
+    def close(self):
+        pass
+
+
+class InputRecorder(LiveInput):
+    def __init__(self, path: str, seed: int):
+        """Writes everything the game reads to path, the game must be seeded with seed."""
+        self.seed = seed
+        self.file = open(path, "wb")
+        self.file.write(_HEADER.pack(MAGIC, VERSION, seed))
+
+    def read(self) -> tuple:
+        keys, events = super().read()
+        recorded = [event for event in events if event.type in RECORDED_EVENTS]
+        self.file.write(_STEP.pack(key_mask(keys), len(recorded)))
+        for event in recorded:
+            data = marshal.dumps(_event_dict(event))
+            self.file.write(_EVENT.pack(event.type, len(data)))
+            self.file.write(data)
+        return keys, events
+
+    def close(self):
+        self.file.close()
+
+
+class InputReplayer(LiveInput):
+    def __init__(self, path: str):
+        """Plays back a log written by InputRecorder, seed the game with self.seed.
+        Once the log is over the game gets a QUIT event."""
+        with open(path, "rb") as file:
+            self.data = file.read()
+        magic, version, self.seed = _HEADER.unpack_from(self.data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a replay (or from another version)")
+        self.offset = _HEADER.size
+        self.steps = 0
+
+    @property
+    def finished(self) -> bool:
+        return self.offset >= len(self.data)
+
+    def read(self) -> tuple:
+        # the events the game posted to itself since the last update, the rest of the queue is ignored
+        events = [event for event in pg.event.get() if event.type >= pg.USEREVENT]
+        if self.finished:
+            return KeyState(0), [pg.event.Event(pg.QUIT)] + events
+
+        mask, count = _STEP.unpack_from(self.data, self.offset)
+        self.offset += _STEP.size
+        for _ in range(count):
+            event_type, size = _EVENT.unpack_from(self.data, self.offset)
+            self.offset += _EVENT.size
+            events.append(pg.event.Event(event_type, marshal.loads(self.data[self.offset : self.offset + size])))
+            self.offset += size
+        self.steps += 1
+        return KeyState(mask), events
@@ -0,0 +1,37 @@
+import heapq
+
+# keeps track of who needs an update : sleepers are skipped until a deadline passes or someone wakes them up
+#     scheduler.sleep(key, until=game_time() + 1)   # or until=None to sleep until wake(key)
+#     scheduler.wake_due(game_time())
+#     if key in scheduler.awake: ...
+
+
+class Scheduler:
+    def __init__(self):
+        self.awake = set()
+        self.deadlines = {}  # key -> game time it wakes up at
+        self.heap = []  # (time, order, key), a heap entry is forgotten once its key gets another deadline
+        self.order = 0  # keys with the same deadline wake up in the order they went to sleep
+
+    def wake(self, key):
+        self.awake.add(key)
+        self.deadlines.pop(key, None)
+
+    def sleep(self, key, until: float = None):
+        """Stops updating key until the game time until (None : until wake(key))."""
+        self.awake.discard(key)
+        if until is None:
+            self.deadlines.pop(key, None)
+            return
+        self.deadlines[key] = until
+        heapq.heappush(self.heap, (until, self.order, key))
+        self.order += 1
+
+    def wake_due(self, now: float):
+        """Wakes up every key whose deadline passed."""
+        heap = self.heap
+        while heap and heap[0][0] <= now:
+            until, _, key = heapq.heappop(heap)
+            if self.deadlines.get(key) == until:
+                del self.deadlines[key]
+                self.awake.add(key)
@@ -0,0 +1,314 @@
+import os
+import random
+import numpy as np
+import diskcache
+
+# optimal solver for the sliding puzzle : IDA* guided by additive pattern databases
+# a board is a tuple with the tile of each cell (cell = y * width + x), the tile of a cell is the cell it belongs to,
+# and the empty cell holds the last tile (width * height - 1), which is solved in the bottom right corner
+# moves are given as the cell of the tile to slide into the empty cell (which is where the player clicks)
+
+PATTERN_CACHE_DIR = os.path.join(".cache", "slidingpuzzle")
+MAX_OPTIMAL_CELLS = 16  # up to 4x4, bigger boards only get the manhattan distance, way too weak for optimal solves
+
+
+_neighbors: dict[tuple[int, int], list] = {}
+
+
+def neighbors(width: int, height: int) -> list[tuple[int, ...]]:
+    """For each cell, the cells next to it."""
+    if (width, height) not in _neighbors:
+        cells = []
+        for y in range(height):
+            for x in range(width):
+                around = [(x, y - 1), (x - 1, y), (x + 1, y), (x, y + 1)]
+                cells.append(tuple(ny * width + nx for nx, ny in around if 0 <= nx < width and 0 <= ny < height))
+        _neighbors[width, height] = cells
+    return _neighbors[width, height]
+
+
+def is_solvable(board, width: int, height: int) -> bool:
+    # every move swaps the empty cell with a tile, so the parity of the permutation
+    # and the parity of the distance of the empty cell to its corner change together
+    seen = [False] * len(board)
+    swaps = 0
+    for start in range(len(board)):
+        length = 0
+        cell = start
+        while not seen[cell]:
+            seen[cell] = True
+            cell = board[cell]
+            length += 1
+        swaps += max(0, length - 1)
+    empty = board.index(len(board) - 1)
+    empty_distance = (width - 1 - empty % width) + (height - 1 - empty // width)
+    return swaps % 2 == empty_distance % 2
+
+
+def random_board(width: int, height: int, rng=random) -> tuple[int, ...]:
+    """A random solvable board, every solvable board has the same chances (except the solved one, never given)."""
+    n = width * height
+    while True:
+        board = list(range(n))
+        rng.shuffle(board)
+        if not is_solvable(board, width, height):
+            # swapping two tiles flips the parity : every unsolvable board maps to exactly one solvable board
+            a, b = [cell for cell in range(n) if board[cell] != n - 1][:2]
+            board[a], board[b] = board[b], board[a]
+        if board != list(range(n)):
+            return tuple(board)
+
+
+def apply_moves(board, moves) -> tuple[int, ...]:
+    board = list(board)
+    empty = board.index(len(board) - 1)
+    for cell in moves:
+        board[empty], board[cell] = board[cell], board[empty]
+        empty = cell
+    return tuple(board)
+
+
+# pattern databases
+
+
+def _patterns(width: int, height: int) -> list[tuple[int, ...]]:
+    """Tiles split in groups : 4-4 on 3x3, 5-5-5 on 4x4, one group per tile (the manhattan distance) when bigger."""
+    tiles = list(range(width * height - 1))
+    group_size = 5 if width * height <= MAX_OPTIMAL_CELLS else 1
+    groups = -(-len(tiles) // group_size)
+    size = -(-len(tiles) // groups)  # same sizes as much as possible
+    return [tuple(tiles[i : i + size]) for i in range(0, len(tiles), size)]
+
+
+def _build_pattern_table(width: int, height: int, pattern: tuple[int, ...]) -> np.ndarray:
+    """Smallest number of moves of the pattern tiles to put them at their place, for every position of them.
+    Index : sum of position * n ** slot. Breadth first search over (pattern positions, empty cell),
+    moving the empty cell over the other tiles is free, that's what makes the tables of the groups add up."""
+    n = width * height
+    k = len(pattern)
+    powers = n ** np.arange(k + 1, dtype=np.int64)
+    next_cells = np.full((4, n), -1, dtype=np.int64)
+    for cell, around in enumerate(neighbors(width, height)):
+        next_cells[: len(around), cell] = around
+
+    dist = np.full(n ** (k + 1), 255, dtype=np.uint8)
+
+    def expand(states: np.ndarray, tile_moves: bool) -> np.ndarray:
+        positions = states[:, None] // powers % n
+        empty = positions[:, k]
+        found = []
+        for direction in range(4):
+            cell = next_cells[direction][empty]
+            on_tile = positions[:, :k] == cell[:, None]
+            hit = on_tile.any(axis=1)
+            keep = (cell >= 0) & (hit == tile_moves)
+            moved = states + (cell - empty) * powers[k]
+            if tile_moves:
+                moved += (empty - cell) * powers[on_tile.argmax(axis=1)]
+            found.append(moved[keep])
+        found = np.unique(np.concatenate(found))
+        return found[dist[found] == 255]
+
+    def close(states: np.ndarray, cost: int) -> np.ndarray:
+        """states and everything the empty cell reaches from them for free."""
+        everything = [states]
+        while len(states):
+            states = expand(states, tile_moves=False)
+            dist[states] = cost
+            everything.append(states)
+        return np.concatenate(everything)
+
+    start = np.array([sum(tile * n**slot for slot, tile in enumerate(pattern)) + (n - 1) * n**k])
+    dist[start] = 0
+    frontier = close(start, 0)
+    cost = 0
+    while len(frontier):
+        cost += 1
+        frontier = expand(frontier, tile_moves=True)
+        dist[frontier] = cost
+        frontier = close(frontier, cost)
+    return dist.reshape(n, n**k).min(axis=0)  # wherever the empty cell is
+
+
+def _manhattan_table(width: int, tile: int, n: int) -> np.ndarray:
+    cells = np.arange(n)
+    return (abs(cells % width - tile % width) + abs(cells // width - tile // width)).astype(np.uint8)
+
+
+def pattern_table(width: int, height: int, pattern: tuple[int, ...]) -> bytes:
+    """The table of a pattern, built once and then read from the disk cache."""
+    n = width * height
+    if len(pattern) == 1:
+        return _manhattan_table(width, pattern[0], n).tobytes()
+
+    path = None
+    if PATTERN_CACHE_DIR:
+        name = f"{width}x{height}-{'-'.join(map(str, pattern))}.pdb"
+        path = os.path.join(PATTERN_CACHE_DIR, name)
+        table = diskcache.read_file(path)
+        if table is not None and len(table) == n ** len(pattern):
+            return table
+
+    table = _build_pattern_table(width, height, pattern).tobytes()
+    if path:
+        diskcache.write_file(path, table)
+    return table
+
+
+class Solver:
+    def __init__(self, width: int, height: int):
+        """The tables are built (or read from the disk) here, about 45 s and 220MB at peak the first time on 4x4
+        (0.1 s on 3x3) : make it through a lazy asset handle so the preloader does it."""
+        self.width = width
+        self.height = height
+        self.n = width * height
+        self.neighbors = neighbors(width, height)
+        self.optimal = self.n <= MAX_OPTIMAL_CELLS  # solving a bigger board optimally would take forever
+        self.patterns = _patterns(width, height)
+        self.tables = [pattern_table(width, height, pattern) for pattern in self.patterns]
+        # for each tile : its group and how much its position weighs in the group index
+        self.group_of = [0] * self.n
+        self.weight_of = [0] * self.n
+        for group, pattern in enumerate(self.patterns):
+            for slot, tile in enumerate(pattern):
+                self.group_of[tile] = group
+                self.weight_of[tile] = self.n**slot
+
+    def indexes(self, board) -> list[int]:
+        indexes = [0] * len(self.patterns)
+        for cell, tile in enumerate(board):
+            if tile != self.n - 1:
+                indexes[self.group_of[tile]] += cell * self.weight_of[tile]
+        return indexes
+
+    def heuristic(self, board) -> int:
+        """Never more than the number of moves left."""
+        return sum(table[index] for table, index in zip(self.tables, self.indexes(board)))
+
+    def search(self, board) -> "Search":
+        return Search(self, board)
+
+    def solve(self, board) -> list[int]:
+        """Shortest list of moves, runs the whole search at once."""
+        search = self.search(board)
+        while not search.step(100_000):
+            pass
+        return search.solution
+
+    def greedy_move(self, board, previous=None) -> int | None:
+        """The move that looks the best right now (not always the best one), instantly."""
+        empty = board.index(self.n - 1)
+        best, best_h = None, None
+        for cell in self.neighbors[empty]:
+            if cell == previous:
+                continue
+            moved = list(board)
+            moved[empty], moved[cell] = moved[cell], moved[empty]
+            h = self.heuristic(moved)
+            if best_h is None or h < best_h:
+                best, best_h = cell, h
+        return best
+
+    def board_at_distance(self, distance: int, rng=random) -> tuple[tuple[int, ...], list[int]]:
+        """A random board the given number of moves away from the solved one, and a solution.
+        Random walk from the solved board until the optimal distance is reached, up to 4x4 ;
+        bigger boards get a walk that never comes back on itself, which can only be shorter to solve.
+        Far away boards take a while on 4x4 (a solve per step of the walk)."""
+        board = list(range(self.n))
+        empty = self.n - 1
+        walk = []
+        visited = {tuple(board)}
+        solution = []
+        while len(solution) < distance:
+            cell = rng.choice([cell for cell in self.neighbors[empty] if not walk or cell != walk[-1][1]])
+            board[empty], board[cell] = board[cell], board[empty]
+            walk.append((cell, empty))
+            empty = cell
+            if self.optimal:
+                solution = self.solve(board)
+            elif tuple(board) in visited:  # looped, go back to where we were
+                board[empty], board[walk[-1][1]] = board[walk[-1][1]], board[empty]
+                empty = walk.pop()[1]
+            else:
+                visited.add(tuple(board))
+                solution = [previous for _, previous in reversed(walk)]
+        return tuple(board), solution
+
+
+class Search:
+    def __init__(self, solver: Solver, board):
+        """IDA* from board, run it with step() : it can be spread over many frames."""
+        self.solver = solver
+        self.board = list(board)
+        self.empty = self.board.index(solver.n - 1)
+        self.indexes = solver.indexes(self.board)
+        self.h = sum(table[index] for table, index in zip(solver.tables, self.indexes))
+        self.path = []
+        self.nodes = 0
+        self.pause_at = 0
+        self.solution = None
+        self.done = False
+        self._run = self._iterate()
+
+    def step(self, max_nodes: int) -> bool:
+        """Searches about max_nodes more boards, returns True once the solution is found."""
+        if not self.done:
+            self.pause_at = self.nodes + max_nodes
+            try:
+                next(self._run)
+            except StopIteration:
+                self.done = True
+        return self.done
+
+    def _iterate(self):
+        bound = self.h
+        while True:
+            found = yield from self._dfs(0, bound, -1)
+            if found is True:
+                self.solution = list(self.path)
+                return
+            bound = found
+
+    def _dfs(self, cost: int, bound: int, previous: int):
+        if self.h == 0:
+            return True
+        self.nodes += 1
+        if self.nodes >= self.pause_at:
+            yield
+
+        solver = self.solver
+        board = self.board
+        empty = self.empty
+        smallest = 1 << 30
+        for cell in solver.neighbors[empty]:
+            if cell == previous:
+                continue
+            tile = board[cell]
+            group = solver.group_of[tile]
+            table = solver.tables[group]
+            old_index = self.indexes[group]
+            new_index = old_index + (empty - cell) * solver.weight_of[tile]
+            h = self.h - table[old_index] + table[new_index]
+            if cost + 1 + h > bound:
+                smallest = min(smallest, cost + 1 + h)
+                continue
+
+            # slide the tile into the empty cell
+            old_h = self.h
+            board[empty], board[cell] = tile, board[empty]
+            self.indexes[group] = new_index
+            self.h = h
+            self.empty = cell
+            self.path.append(cell)
+
+            found = yield from self._dfs(cost + 1, bound, empty)
+            if found is True:
+                return True
+            smallest = min(smallest, found)
+
+            self.path.pop()
+            board[cell], board[empty] = tile, board[cell]
+            self.indexes[group] = old_index
+            self.h = old_h
+            self.empty = empty
+        return smallest
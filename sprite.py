@@ -1,27 +1,220 @@
 from pygame import Surface, SRCALPHA, image, error, transform
+from collections import OrderedDict
 import math
+import mmap
+import os
+import struct
+import threading
+import weakref
+import diskcache
+
+# decoded + scaled images are stored here as raw RGBA so the next launch skips the decoding and the resizing
+# set to None to disable the cache, delete the folder to clear it (see diskcache.py)
+IMAGE_CACHE_DIR = os.path.join(".cache", "images")
+IMAGE_CACHE_MAX_BYTES = 256 * 1024 * 1024  # the least recently used images are removed past this
+_CACHE_HEADER = struct.Struct("<4sII")  # magic, width, height
+_CACHE_MAGIC = b"RGBA"
+
+
+def _read_cached_image(cache_path) -> Surface | None:
+    try:
+        with open(cache_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            magic, width, height = _CACHE_HEADER.unpack_from(mapped)
+            if magic != _CACHE_MAGIC or len(mapped) != _CACHE_HEADER.size + width * height * 4:
+                return None
+            pixels = memoryview(mapped)[_CACHE_HEADER.size:]
+            try:
+                # convert_alpha copies the pixels, so the mapping can be closed afterwards
+                img = image.frombuffer(pixels, (width, height), "RGBA").convert_alpha()
+            finally:
+                pixels.release()
+        diskcache.touch(cache_path)
+        return img
+    except (OSError, ValueError, struct.error):
+        return None
+
 
 def load_image(path, scale = 1, size = None) -> Surface:
     try:
+        cache_path = diskcache.cache_path(IMAGE_CACHE_DIR, path, scale, size, suffix=".rgba") if IMAGE_CACHE_DIR else None
+        if cache_path:
+            img = _read_cached_image(cache_path)
+            if img is not None:
+                return img
+
         img = image.load(path).convert_alpha()
         if scale != 1:
             img = transform.scale_by(img, scale)
         if size is not None:
             img = transform.scale(img, size)
+
+        if cache_path:
+            diskcache.write_file(
+                cache_path,
+                _CACHE_HEADER.pack(_CACHE_MAGIC, *img.get_size()),
+                image.tobytes(img, "RGBA"),
+                max_bytes=IMAGE_CACHE_MAX_BYTES,
+            )
         return img
-    except error as e:
+    except (error, FileNotFoundError) as e:
         print(f"Cannot load image: {path}")
         raise SystemExit(e)
 
+class SurfaceLRU:
+    def __init__(self, budget_bytes : int):
+        """Surfaces by key, the least recently used ones are dropped once budget_bytes is exceeded.
+        An entry can be made from source surfaces, it is dropped with them."""
+        self.budget_bytes = budget_bytes
+        self.used_bytes = 0
+        self._entries : OrderedDict[tuple, tuple[tuple[weakref.ref, ...], Surface]] = OrderedDict()
+        self._lock = threading.Lock()  # entries can be made from the preloader threads
+
+    def lookup(self, key : tuple, *sources : Surface) -> Surface | None:
+        full_key = (key, *map(id, sources))
+        with self._lock:
+            entry = self._entries.get(full_key)
+            if entry is None:
+                return None
+            if not all(ref() is source for ref, source in zip(entry[0], sources)):
+                self._remove(full_key)  # a source died and its id got reused
+                return None
+            self._entries.move_to_end(full_key)
+            return entry[1]
+
+    def store(self, key : tuple, surf : Surface, *sources : Surface):
+        size = surf.get_width() * surf.get_height() * surf.get_bytesize()
+        if size > self.budget_bytes:
+            return
+        full_key = (key, *map(id, sources))
+        with self._lock:
+            if full_key in self._entries:  # made by another thread meanwhile
+                self._remove(full_key)
+            self._entries[full_key] = (tuple(map(weakref.ref, sources)), surf)
+            self.used_bytes += size
+            while self.used_bytes > self.budget_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, full_key : tuple):
+        _, surf = self._entries.pop(full_key)
+        self.used_bytes -= surf.get_width() * surf.get_height() * surf.get_bytesize()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.used_bytes = 0
+
+
+class ScaleCache(SurfaceLRU):
+    def __init__(self, budget_bytes : int = 64 * 1024 * 1024):
+        """Keeps the scaled variants of surfaces, the least recently used ones are dropped once budget_bytes is exceeded.
+        Downscales go through a chain of halved versions of the source (mipmaps), so big reductions only resample a small image."""
+        super().__init__(budget_bytes)
+
+    def _mip_source(self, source : Surface, size : tuple[int, int]) -> Surface:
+        """Returns the smallest halved version of source that is still at least as big as size."""
+        mip = source
+        while mip.get_width() >= size[0] * 2 and mip.get_height() >= size[1] * 2:
+            half_size = (mip.get_width() // 2, mip.get_height() // 2)
+            key = (half_size, "mip")
+            half = self.lookup(key, source)
+            if half is None:
+                half = transform.smoothscale(mip, half_size)
+                self.store(key, half, source)
+            mip = half
+        return mip
+
+    def get(self, source : Surface, size : tuple[int, int], smooth = False, keep = True) -> Surface:
+        """Returns source scaled to size. The result is shared : don't draw on it.
+        keep=False skips storing the result (for sizes that are only used once), the mipmaps are still used."""
+        size = (int(size[0]), int(size[1]))
+        if size == source.get_size():
+            return source
+        key = (size, smooth)
+        surf = self.lookup(key, source)
+        if surf is not None:
+            return surf
+
+        mip = self._mip_source(source, size)
+        surf = transform.smoothscale(mip, size) if smooth else transform.scale(mip, size)
+        if keep:
+            self.store(key, surf, source)
+        return surf
+
+
+SCALE_CACHE = ScaleCache()
+
+
+def scaled(source : Surface, size : tuple[int, int], smooth = False, keep = True) -> Surface:
+    """Shortcut for SCALE_CACHE.get, see ScaleCache.get."""
+    return SCALE_CACHE.get(source, size, smooth, keep)
+
+
+class SpriteCache(SurfaceLRU):
+    def __init__(self, budget_bytes : int = 32 * 1024 * 1024):
+        """Pre-rendered widgets : each look of a widget (a button and its label, a card and its border...) is
+        composited once in the display format, then drawing the widget is a single blit.
+        The least recently used ones are dropped once budget_bytes is exceeded."""
+        super().__init__(budget_bytes)
+
+    def get(self, key : tuple, build, *sources : Surface) -> Surface:
+        """The sprite made by build(), which must only depend on key and on the sources surfaces
+        (the sprite is dropped with them). Shared : don't draw on it."""
+        surf = self.lookup(key, *sources)
+        if surf is not None:
+            return surf
+
+        surf = build()
+        try:
+            surf = surf.convert_alpha() if surf.get_flags() & SRCALPHA else surf.convert()
+        except error:
+            pass  # no display yet, keep the default format
+        self.store(key, surf, *sources)
+        return surf
+
+
+SPRITE_CACHE = SpriteCache()
+
+
+def widget_sprite(key : tuple, build, *sources : Surface) -> Surface:
+    """Shortcut for SPRITE_CACHE.get, see SpriteCache.get."""
+    return SPRITE_CACHE.get(key, build, *sources)
+
+
 class Spritesheet:
     def __init__(self, sprite : Surface, img_size : tuple[int]) -> None:
         """Initializes the spritesheet with the image and the size of the images in the spritesheet."""
         self.surf = sprite
         self.rect = self.surf.get_rect()
         self.img_size = img_size
+        self._bake_frames()
 
-    def get_img(self, coord : tuple[int]) -> Surface:
-        """Returns the image at the given coordinates in the spritesheet."""
+    def _bake_frames(self):
+        """Cuts every image of the spritesheet once, so getting a frame never allocates a surface."""
+        columns = math.ceil(self.rect.width / self.img_size[0])
+        lines = math.ceil(self.rect.height / self.img_size[1])
+        frames = {(x, y): self._cut_img((x, y)) for y in range(lines) for x in range(columns)}
+        self.frame_tables : dict[tuple[bool, bool], dict[tuple[int, int], Surface]] = {(False, False): frames}
+
+    def get_frames(self, flip_x = False, flip_y = False) -> dict[tuple[int, int], Surface]:
+        """Returns every image of the spritesheet by coordinates, mirrored if asked.
+        Mirrored tables are only made the first time they are asked for."""
+        key = (flip_x, flip_y)
+        if key not in self.frame_tables:
+            self.frame_tables[key] = {
+                coord: transform.flip(frame, flip_x, flip_y)
+                for coord, frame in self.frame_tables[(False, False)].items()
+            }
+        return self.frame_tables[key]
+
+    def get_img(self, coord : tuple[int], flip_x = False, flip_y = False) -> Surface:
+        """Returns the image at the given coordinates in the spritesheet.
+        The surface is shared by everyone asking for the same image : don't draw on it."""
+        frame = self.get_frames(flip_x, flip_y).get(tuple(coord))
+        if frame is None:  # outside of the spritesheet
+            frame = transform.flip(self._cut_img(coord), flip_x, flip_y)
+        return frame
+
+    def _cut_img(self, coord : tuple[int]) -> Surface:
         coord_x_px = coord[0]*self.img_size[0] #take the last x-coord to calculate the next position
         coord_y_py = coord[1]*self.img_size[1] #take the last y-coord to calculate the next position
         try:
@@ -38,6 +231,7 @@ class Spritesheet:
         """Returns the state of the object for safely pickling.
         Needed because the Surface object cannot be pickled, so we convert it to a bytestring."""
         state = self.__dict__.copy()
+        del state["frame_tables"]  # rebuilt when unpickling
         state["surf"] = (image.tostring(self.surf, "RGBA"), self.surf.get_size()) # convert the surface to a bytestring
         return state
     
@@ -46,6 +240,7 @@ class Spritesheet:
         Needed because the Surface object cannot be pickled, so we convert it back from a bytestring."""
         self.__dict__ = state 
         self.surf = image.frombuffer(self.surf[0], self.surf[1], "RGBA")  # convert the bytestring back to a surface
+        self._bake_frames()
 
 
 class Animation:
@@ -59,9 +254,10 @@ class Animation:
         self.__speed_incr = 0
         self.repeat = repeat
 
-    def get_frame(self) -> Surface:
+    def get_frame(self, flip_x = False, flip_y = False) -> Surface:
         """returns the current frame of the animation and changes the frame if needed.  
-        Needs to be called every frame to update the animation with the right speed."""
+        Needs to be called every frame to update the animation with the right speed.
+        The frame is shared with the spritesheet : don't draw on it."""
         if self.img_index == self.length-1 and self.repeat:
             self.img_index = 0
         
@@ -72,17 +268,15 @@ class Animation:
         else:
             self.__speed_incr += 1
         
-        new_surf = self.spritesheet.get_img((self.img_index, self.line))
-        return new_surf
+        return self.spritesheet.get_img((self.img_index, self.line), flip_x, flip_y)
     
-    def reset_frame(self):
+    def reset_frame(self, flip_x = False, flip_y = False):
         """resets the animation to the first frame.  
         Can be useful for restarting the animation from the beginning
         returns 1st frame of the animation."""
         self.img_index = 0  
 
-        new_surf = self.spritesheet.get_img((0, self.line))
-        return new_surf
+        return self.spritesheet.get_img((0, self.line), flip_x, flip_y)
     
     def copy(self):
         return Animation(self.spritesheet,self.line,self.length,self.speed,self.repeat)
@@ -92,19 +286,50 @@ class Animation:
         if self.img_index == self.length-1 : #check if it's the last picture of the spritesheet
             return True
         
+# fade curves : take how far the fade is (0 to 1) and give how opaque the overlay is (0 to 1)
+# they go up until the middle of the fade and back down, like the sine the fades always used
+def fade_sine(t : float) -> float:
+    return math.sin(t * math.pi)
+
+def fade_linear(t : float) -> float:
+    return 1 - abs(2 * t - 1)
+
+def fade_smooth(t : float) -> float:
+    x = fade_linear(t)
+    return x * x * (3 - 2 * x)  # smoothstep, eases in and out of both ends
+
+
+_fade_overlays : dict[tuple, Surface] = {}
+
+def _fade_overlay(size : tuple[int, int], color) -> Surface:
+    """One plain colored surface per (size, color), the fades only change its alpha."""
+    key = (size, tuple(color))
+    overlay = _fade_overlays.get(key)
+    if overlay is None:
+        overlay = Surface(size)  # no per pixel alpha needed, set_alpha is enough and blits faster
+        try:
+            overlay = overlay.convert()
+        except error:
+            pass  # no display yet, keep the default format
+        overlay.fill(color)
+        _fade_overlays[key] = overlay
+    return overlay
+
+
 class ScreenFade:
-    def __init__(self):
+    def __init__(self, color = (0, 0, 0), easing = fade_sine):
         self.playing = False
         self.incr = 0
         self.alpha = 0
+        self.color = color
+        self.easing = easing
 
     def draw(self, surface : Surface):
         if not self.playing:
             return
-        fade_surf = Surface(surface.get_size(), flags=SRCALPHA)
-        fade_surf.fill((0,0,0))
-        fade_surf.set_alpha(self.alpha)
-        surface.blit(fade_surf, (0,0))
+        overlay = _fade_overlay(surface.get_size(), self.color)
+        overlay.set_alpha(self.alpha)
+        surface.blit(overlay, (0,0))
 
     def update(self):
         if not self.playing:
@@ -114,12 +339,17 @@ class ScreenFade:
         if self.incr > self.stop:
             self.incr = 0
             self.playing = False
-        self.alpha = int(math.sin(self.incr) * 255)
+        self.alpha = int(self.easing(self.incr / math.pi) * 255)
 
     def is_ascending(self):
         return self.incr < math.pi/2
 
-    def start(self, speed: float, stop = math.pi, start = 0):
+    def start(self, speed: float, stop = math.pi, start = 0, color = None, easing = None):
+        """speed is the fraction of the fade done each update, start and stop go from 0 to pi (pi/2 is fully opaque)."""
+        if color is not None:
+            self.color = color
+        if easing is not None:
+            self.easing = easing
         self.playing = True
         self.alpha = 0
         self.incr = start
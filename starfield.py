@@ -1,124 +1,216 @@
 import pygame as pg
+import numpy as np
 import random
-from typing import List, Tuple
-
-
-class Star:
-    """Represents a single star in the starfield."""
-    
-    def __init__(self, x: float, y: float, speed: float, brightness: int, size: int = 1, twinkle: bool = False):
-        self.x = x
-        self.y = y
-        self.speed = speed
-        self.base_brightness = brightness  # Base brightness value
-        self.current_brightness = brightness
-        self.size = size
-        self.twinkle = twinkle
-        self.twinkle_timer = random.random() * 60  # Random phase for twinkling
-        self.color = (brightness, brightness, brightness)
-    
-    def update(self, screen_height: int, screen_width: int) -> None:
-        """Update star position and twinkling effect."""
-        self.y += self.speed
-        
-        # Reset star to top when it goes off the bottom
-        if self.y > screen_height + 10:
-            self.y = random.randint(-50, -10)
-            self.x = random.randint(0, screen_width)
-        
-        # Handle twinkling effect
-        if self.twinkle:
-            self.twinkle_timer += 0.1
-            # Create a subtle brightness variation
-            variation = int(20 * abs(pg.math.Vector2(1, 0).rotate(self.twinkle_timer * 180).x))
-            self.current_brightness = max(0, min(255, self.base_brightness + variation - 10))
-            self.color = (self.current_brightness, self.current_brightness, self.current_brightness)
-    
-    def draw(self, surface: pg.Surface) -> None:
-        """Draw the star on the surface."""
-        if self.size == 1:
-            # Single pixel star
-            if 0 <= self.x < surface.get_width() and 0 <= self.y < surface.get_height():
-                surface.set_at((int(self.x), int(self.y)), self.color)
-        else:
-            # Multi-pixel star (circle)
-            if 0 <= self.x < surface.get_width() and 0 <= self.y < surface.get_height():
-                pg.draw.circle(surface, self.color, (int(self.x), int(self.y)), self.size)
+
+
+def _disk_offsets(radius: int) -> tuple[np.ndarray, np.ndarray]:
+    """Pixel offsets covered by pg.draw.circle for the given radius, so big stars look exactly like before."""
+    stamp = pg.Surface((radius * 2 + 1, radius * 2 + 1))
+    pg.draw.circle(stamp, (255, 255, 255), (radius, radius), radius)
+    dx, dy = np.nonzero(pg.surfarray.array_red(stamp))
+    return dx - radius, dy - radius
 
 
 class Starfield:
-    """Manages a collection of stars creating a starfield effect."""
-    
-    def __init__(self, screen_width: int, screen_height: int, num_stars: int = 200):
+    """Manages a collection of stars creating a starfield effect.
+    Stars are stored as arrays (one entry per star) so they are all updated and drawn at once with numpy."""
+
+    STAMPS = {size: _disk_offsets(size) for size in (2, 3)}  # stars bigger than a pixel
+    _gray_luts: dict[tuple, np.ndarray] = {}  # brightness -> mapped pixel value, for each pixel format
+    DIRTY_TILE_SIZE = 16
+    DIRTY_RECT_LIMIT = 512  # above this many changed tiles, draw_dirty reports a single bounding rect
+
+    def __init__(self, screen_width: int, screen_height: int, num_stars: int = 200, seed: int | None = None):
         self.screen_width = screen_width
         self.screen_height = screen_height
-        self.stars: List[Star] = []
-        
+        # seeded from the random module by default, so seeding it is enough to get the same sky
+        self.rng = np.random.default_rng(random.getrandbits(64) if seed is None else seed)
+
+        self.x = np.empty(0, dtype=np.float32)
+        self.y = np.empty(0, dtype=np.float32)
+        self.speed = np.empty(0, dtype=np.float32)
+        self.base_brightness = np.empty(0, dtype=np.int16)  # Base brightness value
+        self.brightness = np.empty(0, dtype=np.uint8)  # with the twinkling applied
+        self.size = np.empty(0, dtype=np.uint8)
+        self.twinkle = np.empty(0, dtype=bool)
+        self.twinkle_timer = np.empty(0, dtype=np.float32)
+        self._drawn = (np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp))  # pixels covered by the last draw
+
         # Create initial stars scattered across the screen
-        for _ in range(num_stars):
-            self._create_random_star(initial_scatter=True)
-    
-    def _create_random_star(self, initial_scatter: bool = False) -> None:
-        """Create a single random star."""
-        x = random.randint(0, self.screen_width)
-        
+        self._create_random_stars(num_stars, initial_scatter=True)
+
+    @property
+    def star_count(self) -> int:
+        return len(self.x)
+
+    def _create_random_stars(self, count: int, initial_scatter: bool = False) -> None:
+        """Create count random stars."""
+        rng = self.rng
+        x = rng.integers(0, self.screen_width, count, endpoint=True)
+
         if initial_scatter:
             # For initial setup, scatter stars across the entire screen
-            y = random.randint(0, self.screen_height)
+            y = rng.integers(0, self.screen_height, count, endpoint=True)
         else:
             # For new stars during gameplay, start them above the screen
-            y = random.randint(-self.screen_height, self.screen_height)
-        
+            y = rng.integers(-self.screen_height, self.screen_height, count, endpoint=True)
+
         # Vary speed (slower stars are further away)
-        speed = random.uniform(0.3, 3.5)
-        
+        speed = rng.uniform(0.3, 3.5, count)
+
         # Vary brightness (dimmer stars are further away, brighter ones closer)
         # Bias toward dimmer stars for more realistic effect
-        brightness_roll = random.random()
-        twinkle = False
-        
-        if brightness_roll < 0.7:  # 70% dim stars
-            brightness = random.randint(40, 100)
-            size = 1
-        elif brightness_roll < 0.9:  # 20% medium stars
-            brightness = random.randint(100, 180)
-            size = random.choice([1, 2])
-            twinkle = random.random() < 0.3  # 30% chance to twinkle
-        else:  # 10% bright stars
-            brightness = random.randint(180, 255)
-            size = random.choice([2, 3])
-            twinkle = random.random() < 0.7  # 70% chance to twinkle
-        
-        star = Star(x, y, speed, brightness, size, twinkle)
-        self.stars.append(star)
-    
+        brightness_roll = rng.random(count)
+        medium = (brightness_roll >= 0.7) & (brightness_roll < 0.9)  # 20% medium stars
+        bright = brightness_roll >= 0.9  # 10% bright stars, the other 70% are dim
+
+        brightness = rng.integers(40, 100, count, endpoint=True)
+        brightness[medium] = rng.integers(100, 180, medium.sum(), endpoint=True)
+        brightness[bright] = rng.integers(180, 255, bright.sum(), endpoint=True)
+
+        size = np.ones(count, dtype=np.uint8)
+        size[medium] = rng.choice([1, 2], medium.sum())
+        size[bright] = rng.choice([2, 3], bright.sum())
+
+        twinkle_roll = rng.random(count)
+        twinkle = (medium & (twinkle_roll < 0.3)) | (bright & (twinkle_roll < 0.7))
+
+        self.x = np.concatenate((self.x, x.astype(np.float32)))
+        self.y = np.concatenate((self.y, y.astype(np.float32)))
+        self.speed = np.concatenate((self.speed, speed.astype(np.float32)))
+        self.base_brightness = np.concatenate((self.base_brightness, brightness.astype(np.int16)))
+        self.brightness = np.concatenate((self.brightness, brightness.astype(np.uint8)))
+        self.size = np.concatenate((self.size, size))
+        self.twinkle = np.concatenate((self.twinkle, twinkle))
+        # Random phase for twinkling
+        self.twinkle_timer = np.concatenate((self.twinkle_timer, (rng.random(count) * 60).astype(np.float32)))
+
     def update(self) -> None:
         """Update all stars in the starfield."""
-        for star in self.stars:
-            star.update(self.screen_height, self.screen_width)
-    
-    def draw(self, surface: pg.Surface) -> None:
-        """Draw all stars on the surface."""
-        for star in self.stars:
-            star.draw(surface)
-    
+        self.y += self.speed
+
+        # Reset stars to the top when they go off the bottom
+        fallen = np.flatnonzero(self.y > self.screen_height + 10)
+        if len(fallen):
+            self.y[fallen] = self.rng.integers(-50, -10, len(fallen), endpoint=True)
+            self.x[fallen] = self.rng.integers(0, self.screen_width, len(fallen), endpoint=True)
+
+        # Handle twinkling effect : a subtle brightness variation
+        self.twinkle_timer[self.twinkle] += 0.1
+        variation = (20 * np.abs(np.cos(self.twinkle_timer[self.twinkle] * np.pi))).astype(np.int16)
+        self.brightness[self.twinkle] = np.clip(self.base_brightness[self.twinkle] + variation - 10, 0, 255)
+
+    def _star_pixels(self, surface: pg.Surface) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Every pixel covered by the stars : x, y and mapped color arrays."""
+        x = self.x.astype(np.intp)
+        y = self.y.astype(np.intp)
+        # like before, only stars whose center is on the surface are drawn
+        on_surface = (self.x >= 0) & (self.x < surface.get_width()) & (self.y >= 0) & (self.y < surface.get_height())
+        colors = self._gray_lut(surface)[self.brightness]
+
+        single = np.flatnonzero(on_surface & (self.size == 1))
+        all_x, all_y, all_colors = [x[single]], [y[single]], [colors[single]]
+        for size, (dx, dy) in self.STAMPS.items():
+            stars = np.flatnonzero(on_surface & (self.size == size))
+            all_x.append((x[stars, None] + dx).ravel())
+            all_y.append((y[stars, None] + dy).ravel())
+            all_colors.append(np.repeat(colors[stars], len(dx)))
+        return np.concatenate(all_x), np.concatenate(all_y), np.concatenate(all_colors)
+
+    def draw(self, surface: pg.Surface, exclude: list[pg.Rect] = ()) -> None:
+        """Draw all stars on the surface (the clip area of the surface is respected), except in the exclude areas."""
+        px, py, colors = self._star_pixels(surface)
+        self._drawn = (px, py)
+        if exclude:
+            kept = self._outside(px, py, exclude)
+            px, py, colors = px[kept], py[kept], colors[kept]
+
+        pixels = pg.surfarray.pixels2d(surface)
+        try:
+            self._write(pixels, surface.get_clip(), px, py, colors)
+        finally:
+            del pixels  # unlocks the surface
+
+    def draw_dirty(self, surface: pg.Surface, exclude: list[pg.Rect], background_color=(0, 0, 0)) -> list[pg.Rect]:
+        """Erases the stars where they were last drawn and draws them at their new position,
+        leaving the exclude areas alone (they are hidden or redrawn by someone else).
+        Returns the changed areas, for pg.display.update."""
+        old_x, old_y = self._drawn
+        px, py, colors = self._star_pixels(surface)
+        self._drawn = (px, py)
+
+        clip = surface.get_clip()
+        old_kept = self._inside(old_x, old_y, clip) & self._outside(old_x, old_y, exclude)
+        new_kept = self._inside(px, py, clip) & self._outside(px, py, exclude)
+        old_x, old_y = old_x[old_kept], old_y[old_kept]
+        px, py, colors = px[new_kept], py[new_kept], colors[new_kept]
+
+        pixels = pg.surfarray.pixels2d(surface)
+        try:
+            self._write(pixels, clip, old_x, old_y, np.full(len(old_x), surface.map_rgb(background_color), dtype=np.uint32))
+            self._write(pixels, clip, px, py, colors)
+        finally:
+            del pixels
+
+        # changed pixels are grouped in tiles, so there is at most one rect per tile
+        tile = self.DIRTY_TILE_SIZE
+        changed_x = np.concatenate((old_x, px)) // tile
+        changed_y = np.concatenate((old_y, py)) // tile
+        if not len(changed_x):
+            return []
+        tiles = np.unique(changed_y * (surface.get_width() // tile + 1) + changed_x)
+        if len(tiles) > self.DIRTY_RECT_LIMIT:
+            # too many little rects, one big one is cheaper to push
+            left, top = changed_x.min() * tile, changed_y.min() * tile
+            return [pg.Rect(left, top, (changed_x.max() + 1) * tile - left, (changed_y.max() + 1) * tile - top)]
+        tiles_y, tiles_x = np.divmod(tiles, surface.get_width() // tile + 1)
+        return [pg.Rect(x * tile, y * tile, tile, tile) for x, y in zip(tiles_x.tolist(), tiles_y.tolist())]
+
+    @staticmethod
+    def _inside(x: np.ndarray, y: np.ndarray, rect: pg.Rect) -> np.ndarray:
+        return (x >= rect.left) & (x < rect.right) & (y >= rect.top) & (y < rect.bottom)
+
+    @classmethod
+    def _outside(cls, x: np.ndarray, y: np.ndarray, rects: list[pg.Rect]) -> np.ndarray:
+        outside = np.ones(len(x), dtype=bool)
+        for rect in rects:
+            outside &= ~cls._inside(x, y, rect)
+        return outside
+
+    @classmethod
+    def _gray_lut(cls, surface: pg.Surface) -> np.ndarray:
+        key = (surface.get_bitsize(), surface.get_masks())
+        lut = cls._gray_luts.get(key)
+        if lut is None:
+            lut = np.array([surface.map_rgb((b, b, b)) for b in range(256)], dtype=np.uint32)
+            cls._gray_luts[key] = lut
+        return lut
+
+    @classmethod
+    def _write(cls, pixels: np.ndarray, clip: pg.Rect, x: np.ndarray, y: np.ndarray, colors: np.ndarray):
+        inside = cls._inside(x, y, clip)
+        pixels[x[inside], y[inside]] = colors[inside]
+
     def add_star(self) -> None:
         """Add a new random star to the field."""
-        self._create_random_star(initial_scatter=False)
-    
+        self._create_random_stars(1, initial_scatter=False)
+
     def remove_star(self) -> None:
         """Remove a star from the field."""
-        if self.stars:
-            self.stars.pop()
-    
+        if self.star_count:
+            self._keep(self.star_count - 1)
+
+    def _keep(self, count: int) -> None:
+        for name in ("x", "y", "speed", "base_brightness", "brightness", "size", "twinkle", "twinkle_timer"):
+            setattr(self, name, getattr(self, name)[:count].copy())
+
     def set_star_count(self, count: int) -> None:
         """Set the total number of stars."""
-        current_count = len(self.stars)
-        
+        current_count = self.star_count
+
         if count > current_count:
             # Add stars (new stars start above screen during gameplay)
-            for _ in range(count - current_count):
-                self.add_star()
+            self._create_random_stars(count - current_count, initial_scatter=False)
         elif count < current_count:
             # Remove stars
-            self.stars = self.stars[:count]
+            self._keep(count)
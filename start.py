@@ -1,28 +1,30 @@
 import pygame as pg
 
 import sprite
+from fonts import render_text
 from globalSurfaces import START_GAME_SOUND, WALLPAPER_START
 
 
-def run(clock: pg.time.Clock, display: pg.Surface):
+def run(clock: pg.time.Clock, display: pg.Surface, fps: int = 60, auto_start=False):
+    """fps 0 doesn't wait between frames, auto_start starts the game as if a key was pressed (headless runs)."""
 
     ## paul si tu passes par là, ne touches rien, t'inquiète, ça marche uwu
 
     pg.mixer.music.play(-1)
 
     def show_happy_birthday(y: int, size: float):
-        fun_font = pg.font.Font("assets\start_assets\\fun font.ttf", size)
-
-        happy_birthday = fun_font.render("Joyeux Anniversaires, Papa!", True, "pink")
+        happy_birthday = render_text(
+            "Joyeux Anniversaires, Papa!", "pink", size, "assets/start_assets/fun font.ttf"
+        )
 
         image_rect = happy_birthday.get_rect(center=(display.get_width() / 2, y))
 
         display.blit(happy_birthday, image_rect)
 
     def show_press_key(y: int, size: float):
-        text_font = pg.font.Font("assets\start_assets\\under_text_font.ttf", size)
-
-        happy_birthday = text_font.render("Press any key to start", True, "black")
+        happy_birthday = render_text(
+            "Press any key to start", "black", size, "assets/start_assets/under_text_font.ttf"
+        )
 
         image_rect = happy_birthday.get_rect(center=(display.get_width() / 2, y))
 
@@ -30,8 +32,11 @@ def run(clock: pg.time.Clock, display: pg.Surface):
 
     running = True
     fade = sprite.ScreenFade()
+    if auto_start:
+        fade.start(0.012)
+        running = False
     while running or fade.is_ascending():
-        display.blit(WALLPAPER_START, (0, 0))
+        display.blit(WALLPAPER_START.get(), (0, 0))
 
         show_happy_birthday(200, 50)
         show_press_key(900, 40)
@@ -51,4 +56,4 @@ def run(clock: pg.time.Clock, display: pg.Surface):
 
         pg.display.flip()
         display.fill("black")
-        clock.tick_busy_loop(60)
+        clock.tick_busy_loop(fps)
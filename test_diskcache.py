@@ -0,0 +1,37 @@
+import os
+
+import diskcache
+
+
+def test_new_version_of_a_source_replaces_the_old_one(tmp_path):
+    source = tmp_path / "image.png"
+    source.write_bytes(b"v1")
+    cache_dir = str(tmp_path / "cache")
+    small = diskcache.cache_path(cache_dir, str(source), 0.5, suffix=".rgba")
+    big = diskcache.cache_path(cache_dir, str(source), 1, suffix=".rgba")
+    diskcache.write_file(small, b"small")
+    diskcache.write_file(big, b"big")
+
+    source.write_bytes(b"version 2")
+    os.utime(source, ns=(0, 0))
+    new = diskcache.cache_path(cache_dir, str(source), 1, suffix=".rgba")
+    diskcache.write_file(new, b"new")
+
+    assert os.listdir(cache_dir) == [os.path.basename(new)]
+    assert diskcache.read_file(new) == b"new"
+
+
+def test_least_recently_used_files_go_past_max_bytes(tmp_path):
+    cache_dir = tmp_path / "cache"
+    paths = []
+    for i in range(3):
+        source = tmp_path / f"{i}.png"
+        source.write_bytes(b"x")
+        paths.append(diskcache.cache_path(str(cache_dir), str(source), suffix=".rgba"))
+        diskcache.write_file(paths[-1], b"0123456789", max_bytes=25)
+        os.utime(paths[-1], ns=(i * 10**9, i * 10**9))
+    assert sorted(os.listdir(cache_dir)) == sorted(os.path.basename(path) for path in paths[1:])
+
+    os.utime(paths[1], ns=(0, 0))  # read long ago
+    diskcache.write_file(paths[0], b"0123456789", max_bytes=25)
+    assert sorted(os.listdir(cache_dir)) == sorted(os.path.basename(path) for path in (paths[0], paths[2]))
@@ -0,0 +1,31 @@
+import os
+
+import pytest
+
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+pg = pytest.importorskip("pygame")
+
+
+def test_cards_with_the_same_picture_match():
+    import audio
+
+    audio.pre_init()
+    pg.init()
+    pg.display.set_mode((1920, 1080))
+    import globalSurfaces as gs
+    import minigame
+
+    photos = [gs.RASINARI_PHOTO, gs.PHOTO_OF_2011, gs.CHEESE_PHOTO, gs.LOUIS_PHOTO, gs.PAPA_PERRUQUE, gs.HISOITRE_PHOTO]
+    game = minigame.Memory((16, 16), photos)
+    game.boundary = pg.Rect(410, 0, 550, 550)
+    game.setup()
+
+    pair_ids = {}  # picture -> pair ids of the cards showing it
+    for card in game.cards:
+        pair_ids.setdefault(id(card.image), set()).add(card.pair_id)
+    assert len(game.cards) == 256
+    assert len(pair_ids) == len(photos)
+    assert all(len(ids) == 1 for ids in pair_ids.values())
+    for ids in pair_ids.values():  # every picture is on an even number of cards, so they can all be matched
+        assert sum(card.pair_id in ids for card in game.cards) % 2 == 0
@@ -0,0 +1,71 @@
+import os
+import time
+
+import pytest
+
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+pg = pytest.importorskip("pygame")
+
+
+def play(monkeypatch, input_source, preload_delay=0.0):
+    """Plays three short levels headless, the levels after the first are built preload_delay seconds late.
+    Returns what the minigames drew at random in each level."""
+    import audio
+    import main
+
+    audio.pre_init()
+    pg.init()
+    display = pg.display.set_mode((1920, 1080))
+    main.import_game_modules()  # once pygame is started, like main.py does
+    import minigame
+    import preloader
+
+    run_job = preloader.PreloadJob._run
+    init_level = main.Game.init_level
+    managers = []
+
+    def slow_run(job):
+        if job._build_level is not main.LEVELS[0]:  # the next levels get built while a level is played
+            time.sleep(preload_delay)
+        return run_job(job)
+
+    def recorded_init_level(game, level_ind, prepared=None):
+        init_level(game, level_ind, prepared)
+        managers.append(game.puzzle_manager)
+
+    with monkeypatch.context() as patch:  # undone after, so the next play wraps the real methods
+        patch.setattr(preloader.PreloadJob, "_run", slow_run)
+        patch.setattr(main.Game, "init_level", recorded_init_level)
+        patch.setattr(pg, "quit", lambda: None)  # the music loaded on import has to stay for the next play
+        game = main.Game(
+            display,
+            headless=True,
+            level_limit=3,
+            level_frame_limit=30,
+            seed=input_source.seed,
+            input_source=input_source,
+        )
+        try:
+            game.run()
+        finally:
+            input_source.close()
+
+    drawn = []
+    for manager in managers:
+        for _, game in manager.minigames_puzzlepiece_epic_duo:
+            if isinstance(game, minigame.ColorSequenceMemory):
+                drawn.append(list(game.sequence))
+            elif isinstance(game, minigame.Memory):
+                drawn.append([card.pair_id for card in game.cards])
+    return drawn
+
+
+def test_replay_does_not_depend_on_preloader_timing(monkeypatch, tmp_path):
+    from replay import InputRecorder, InputReplayer
+
+    path = str(tmp_path / "session.rply")
+    recorded = play(monkeypatch, InputRecorder(path, 1234))
+    replayed = play(monkeypatch, InputReplayer(path), preload_delay=0.2)
+    assert recorded
+    assert replayed == recorded